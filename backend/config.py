@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from types import SimpleNamespace
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
@@ -15,6 +16,11 @@ class Settings(BaseSettings):
     audio_format: str = "pcm"
     channels: int = 1
     chunk_size: int = 512
+    vad_threshold: int = 1000  # RMS of 16-bit samples treated as speech
+    # Off by default: gating at vad_threshold drops quiet speech and word
+    # onsets, and Gemini's own VAD needs the background noise
+    skip_silent_audio: bool = False
+    silence_hangover_ms: int = 500  # silence still forwarded after speech
     
     # Gemini Configuration
     gemini_model: str = "gemini-2.0-flash-exp"
@@ -28,7 +34,14 @@ class Settings(BaseSettings):
     
     # WebSocket Configuration
     websocket_timeout: int = 30
-    max_connections: int = 100
+    max_connections: int = 100  # concurrent WebSocket sessions per process
+    audio_ack_interval: float = 1.0  # seconds between audio_stats acks; 0 disables them
+    # Deflate is negotiated per connection; PCM frames dominate the traffic
+    # and barely compress, so it is off unless explicitly enabled
+    ws_per_message_deflate: bool = False
+    
+    # Server Configuration
+    workers: int = int(os.getenv("WEB_CONCURRENCY", 1))
     
     # Logging
     log_level: str = "INFO"
@@ -40,3 +53,7 @@ class Settings(BaseSettings):
 def get_settings():
     """Get cached settings instance"""
     return Settings()
+
+# Plain-attribute snapshot of the settings for hot paths; values are fixed
+# after startup so there is no need to go through the pydantic model
+SETTINGS = SimpleNamespace(**get_settings().model_dump())
@@ -2,26 +2,37 @@
 FastAPI backend for real-time audio streaming with Pipecat and Gemini Live API
 """
 import asyncio
+import gzip
+import hashlib
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from routes.websocket import websocket_router
 from utils.logger import setup_logger
-from config import get_settings
+from config import SETTINGS
 
 # Setup logging
 setup_logger()
 logger = logging.getLogger(__name__)
 
-# Get application settings
-settings = get_settings()
+# Application settings
+settings = SETTINGS
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     logger.info("Starting FastAPI application")
+    
+    # Load the test client once; it is served from memory afterwards
+    with open("static/index.html", "rb") as f:
+        html = f.read()
+    app.state.index_html = html
+    app.state.index_gz = gzip.compress(html, 6)
+    app.state.index_etag = f'"{hashlib.sha1(html).hexdigest()}"'
+    
     yield
     logger.info("Shutting down FastAPI application")
 
@@ -45,64 +56,85 @@ app.add_middleware(
 # Include WebSocket router
 app.include_router(websocket_router)
 
+@app.get("/static/index.html", response_class=HTMLResponse)
+async def static_index(request: Request):
+    """Test client page, served from memory ahead of the static mount"""
+    state = request.app.state
+    headers = {
+        "ETag": state.index_etag,
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding"
+    }
+    if request.headers.get("if-none-match") == state.index_etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(state.index_gz, media_type="text/html", headers=headers)
+    return Response(state.index_html, media_type="text/html", headers=headers)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-from fastapi.responses import HTMLResponse
+# Root test page, encoded once at import time
+_ROOT_HTML_BYTES = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Real-Time Audio Streaming API</title>
+    <style>
+        body { font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }
+        .card { background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; }
+        .btn { background: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 4px; display: inline-block; margin: 5px; }
+        .btn:hover { background: #0056b3; }
+    </style>
+</head>
+<body>
+    <h1>Real-Time Audio Streaming API</h1>
+    <div class="card">
+        <h2>API Information</h2>
+        <p><strong>Version:</strong> 1.0.0</p>
+        <p><strong>Status:</strong> Active</p>
+        <p><strong>WebSocket Endpoint:</strong> /ws</p>
+    </div>
+    
+    <div class="card">
+        <h2>Test Interface</h2>
+        <p>Test the WebSocket connection and RTVI protocol:</p>
+        <a href="/static/index.html" class="btn">Open Test Client</a>
+    </div>
+    
+    <div class="card">
+        <h2>API Endpoints</h2>
+        <ul>
+            <li><strong>GET /health</strong> - Health check</li>
+            <li><strong>WS /ws</strong> - WebSocket audio streaming</li>
+            <li><strong>GET /ws/connections</strong> - Active connections</li>
+            <li><strong>POST /ws/broadcast</strong> - Broadcast message</li>
+        </ul>
+    </div>
+    
+    <div class="card">
+        <h2>Features</h2>
+        <ul>
+            <li>Real-time audio streaming</li>
+            <li>RTVI protocol support</li>
+            <li>Gemini Live API integration</li>
+            <li>Voice activity detection</li>
+            <li>WebSocket connection management</li>
+        </ul>
+    </div>
+</body>
+</html>
+""".encode("utf-8")
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Root endpoint with test interface"""
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Real-Time Audio Streaming API</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }
-            .card { background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; }
-            .btn { background: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 4px; display: inline-block; margin: 5px; }
-            .btn:hover { background: #0056b3; }
-        </style>
-    </head>
-    <body>
-        <h1>Real-Time Audio Streaming API</h1>
-        <div class="card">
-            <h2>API Information</h2>
-            <p><strong>Version:</strong> 1.0.0</p>
-            <p><strong>Status:</strong> Active</p>
-            <p><strong>WebSocket Endpoint:</strong> /ws</p>
-        </div>
-        
-        <div class="card">
-            <h2>Test Interface</h2>
-            <p>Test the WebSocket connection and RTVI protocol:</p>
-            <a href="/static/index.html" class="btn">Open Test Client</a>
-        </div>
-        
-        <div class="card">
-            <h2>API Endpoints</h2>
-            <ul>
-                <li><strong>GET /health</strong> - Health check</li>
-                <li><strong>WS /ws</strong> - WebSocket audio streaming</li>
-                <li><strong>GET /ws/connections</strong> - Active connections</li>
-                <li><strong>POST /ws/broadcast</strong> - Broadcast message</li>
-            </ul>
-        </div>
-        
-        <div class="card">
-            <h2>Features</h2>
-            <ul>
-                <li>Real-time audio streaming</li>
-                <li>RTVI protocol support</li>
-                <li>Gemini Live API integration</li>
-                <li>Voice activity detection</li>
-                <li>WebSocket connection management</li>
-            </ul>
-        </div>
-    </body>
-    </html>
-    """
+    return Response(
+        _ROOT_HTML_BYTES,
+        media_type="text/html; charset=utf-8",
+        headers={"Cache-Control": "public, max-age=300"}
+    )
 
 @app.get("/health")
 async def health_check():
@@ -111,10 +143,19 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
+    
+    # Connection state lives in-process, so more than one worker splits
+    # /ws/connections and broadcasts; reload only works with one process
+    workers = max(1, settings.workers)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=5050,
-        reload=True,
-        log_level="info"
+        reload=workers == 1,
+        workers=workers,
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=settings.ws_per_message_deflate
     )
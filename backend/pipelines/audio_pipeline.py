@@ -4,43 +4,116 @@ Low-latency audio pipeline for Gemini Live API streaming
 import asyncio
 import logging
 import time
-from typing import Optional, Callable, Dict, Any, List
+from functools import partial
+import numpy as np
+import orjson
+from typing import Optional, Callable, Dict, Any, List, Union
+from fastapi.websockets import WebSocketState
 from services.gemini_live_service import GeminiLiveService
 from services.audio_service import AudioService  
 from services.rtvi_service import RTVIService
 from schemas.rtvi_schemas import RTVIEventType
-from config import get_settings
+from config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
+# Number of pre-allocated audio slots in the input ring buffer
+AUDIO_RING_SLOTS = 24
+
+# Maximum audio chunks forwarded to Gemini in one send
+AUDIO_SEND_BATCH = 8
+
+# Unsent chunks kept before the oldest is dropped (ring minus two in-flight batches)
+AUDIO_MAX_UNSENT = AUDIO_RING_SLOTS - 2 * AUDIO_SEND_BATCH
+
+# Audio duration gathered before forwarding small chunks to Gemini (seconds)
+AUDIO_COALESCE_WINDOW = 0.06
+
+# Number of recent Gemini response times kept for latency stats
+RESPONSE_TIME_WINDOW = 1024
+
+# RTVI events relayed to the client as {"type": <event>, "data": ...}
+FORWARDED_RTVI_EVENTS = (
+    RTVIEventType.BOT_SPEAKING,
+    RTVIEventType.ERROR,
+)
+
+# Constant messages, serialized once; orjson embeds fragments verbatim
+READY_MESSAGE = orjson.Fragment(orjson.dumps({
+    "type": "transport-state-changed",
+    "state": "ready"
+}))
+
+# Window for coalescing outbound WebSocket messages into one frame (seconds)
+SEND_COALESCE_WINDOW = 0.001
+
+# Maximum messages merged into one outbound batch frame
+MAX_SEND_BATCH = 128
+
+# Outbound messages held for a slow client before the oldest are dropped
+OUTBOUND_QUEUE_SIZE = 1024
+
+def _is_voiced(audio_data: Union[bytes, memoryview]) -> bool:
+    """Cheap energy gate: True if the chunk's RMS exceeds the VAD threshold"""
+    samples = np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+    if not samples.size:
+        return False
+    frames = samples.astype(np.float32)
+    return float(np.dot(frames, frames)) > SETTINGS.vad_threshold ** 2 * samples.size
+
 class LowLatencyAudioPipeline:
     """Low-latency audio pipeline for direct Gemini Live API streaming"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.gemini_service = GeminiLiveService()
         self.audio_service = AudioService()
         self.rtvi_service = RTVIService()
         self.is_running = False
         self.websocket = None
+        # Whether the client unpacks {"type": "batch"} frames
+        self.batch_messages = False
         
         # Performance tracking
         self.audio_chunks_received = 0
         self.audio_chunks_sent = 0
-        self.last_audio_time = 0
-        self.response_times = []
+        self.audio_chunks_dropped = 0
+        self.audio_chunks_skipped = 0
+        self.messages_dropped = 0
+        self.last_audio_time_ns = 0
+        # Recent response times (ms) in a preallocated ring
+        self._rt_buf = np.zeros(RESPONSE_TIME_WINDOW, dtype=np.float32)
+        self._rt_i = 0
+        self._rt_n = 0
+        
+        # Silence gating: trailing silence is forwarded for a short hangover
+        # so Gemini can detect the end of a turn, then skipped
+        self._hangover_bytes = SETTINGS.input_sample_rate * 2 * SETTINGS.silence_hangover_ms // 1000
+        self._silent_bytes = self._hangover_bytes
         
-        # Audio buffering for low latency
-        self.audio_buffer = asyncio.Queue(maxsize=10)  # Small buffer for low latency
-        self.response_buffer = asyncio.Queue(maxsize=5)
+        # Audio buffering for low latency: single-producer/single-consumer ring
+        # of pre-allocated slots, so no per-chunk bytes objects are created
+        self._slot_size = SETTINGS.chunk_size * 2  # 16-bit PCM
+        self._slots = [bytearray(self._slot_size) for _ in range(AUDIO_RING_SLOTS)]
+        self._lens = [0] * AUDIO_RING_SLOTS
+        self._head = 0  # next slot to write (producer)
+        self._tail = 0  # next slot to read (consumer)
+        self._claimed = 0  # first slot still referenced by an in-flight send
+        self._pending_len = 0  # bytes written but not yet claimed
+        self._data_event = asyncio.Event()
         
-        # Processing tasks
+        # Outbound WebSocket messages, drained by a single writer task
+        self._out_q = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+        
+        # Processing tasks, supervised together by a task group
+        self._run_task = None
         self.audio_processor_task = None
         self.response_processor_task = None
+        self._writer_task = None
         
-    async def initialize(self, websocket):
+    async def initialize(self, websocket, batch_messages: bool = False):
         """Initialize the audio pipeline"""
         self.websocket = websocket
+        self.batch_messages = batch_messages
         
         # Register RTVI event handlers
         self._register_rtvi_handlers()
@@ -52,11 +125,14 @@ class LowLatencyAudioPipeline:
         
     def _register_rtvi_handlers(self):
         """Register RTVI event handlers"""
-        self.rtvi_service.register_event_handler(RTVIEventType.AUDIO_INPUT, self._handle_audio_input)
-        self.rtvi_service.register_event_handler(RTVIEventType.AUDIO_OUTPUT, self._handle_audio_output)
-        self.rtvi_service.register_event_handler(RTVIEventType.USER_SPEAKING, self._handle_user_speaking)
-        self.rtvi_service.register_event_handler(RTVIEventType.BOT_SPEAKING, self._handle_bot_speaking)
-        self.rtvi_service.register_event_handler(RTVIEventType.ERROR, self._handle_error)
+        handlers = {
+            RTVIEventType.AUDIO_INPUT: self._handle_audio_input,
+            RTVIEventType.AUDIO_OUTPUT: self._handle_audio_output,
+            RTVIEventType.USER_SPEAKING: self._handle_user_speaking,
+        }
+        for event_type in FORWARDED_RTVI_EVENTS:
+            handlers[event_type] = partial(self._forward_event, event_type.value)
+        self.rtvi_service.register_event_handlers(handlers)
         
     async def start(self):
         """Start the audio pipeline"""
@@ -70,72 +146,123 @@ class LowLatencyAudioPipeline:
                 raise Exception("Failed to connect to Gemini Live API")
             
             # Start processing tasks
-            self.audio_processor_task = asyncio.create_task(self._process_audio_input())
-            self.response_processor_task = asyncio.create_task(self._process_gemini_responses())
+            self._run_task = asyncio.create_task(self._run())
             
             self.is_running = True
             
             # Send ready event
             await self.rtvi_service.set_transport_state("ready")
-            await self._send_to_websocket({
-                "type": "transport-state-changed",
-                "state": "ready"
-            })
+            self._enqueue(READY_MESSAGE)
             
             logger.info("Low-latency audio pipeline started successfully")
             
         except Exception as e:
-            logger.error(f"Failed to start pipeline: {e}")
+            logger.error("Failed to start pipeline: %s", e)
             await self.stop()
             raise
             
     async def stop(self):
         """Stop the audio pipeline"""
-        if not self.is_running:
-            return
-            
+        was_running = self.is_running
         self.is_running = False
         
-        # Cancel processing tasks
-        if self.audio_processor_task:
-            self.audio_processor_task.cancel()
-        if self.response_processor_task:
-            self.response_processor_task.cancel()
+        # Wake the audio consumer so it observes the stop
+        self._data_event.set()
+        
+        # Cancel the task group; it cancels and awaits every processing task
+        if self._run_task:
+            self._run_task.cancel()
+            try:
+                await self._run_task
+            except asyncio.CancelledError:
+                pass
+            self._run_task = None
             
         # Disconnect from Gemini
-        await self.gemini_service.disconnect()
+        if was_running:
+            await self.gemini_service.disconnect()
+        
+        # initialize() alone starts the RTVI flush task, so release it and
+        # the DSP pool even when start() never ran or failed
+        self.audio_service.close()
+        await self.rtvi_service.close()
         
         # Clear buffers
-        while not self.audio_buffer.empty():
-            self.audio_buffer.get_nowait()
-        while not self.response_buffer.empty():
-            self.response_buffer.get_nowait()
-            
-        logger.info("Audio pipeline stopped")
+        self._head = self._tail = self._claimed = self._pending_len = 0
+        self._data_event.clear()
+        # Swap in a fresh queue instead of draining item by item
+        self._out_q = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+        
+        if was_running:
+            logger.info("Audio pipeline stopped")
         
-    async def process_audio_input(self, audio_data: bytes):
-        """Process incoming audio data"""
+    async def _run(self):
+        """Run the processing tasks; if one fails, the others are torn down with it"""
+        try:
+            async with asyncio.TaskGroup() as tg:
+                self._writer_task = tg.create_task(self._writer_loop())
+                self.audio_processor_task = tg.create_task(self._process_audio_input())
+                self.response_processor_task = tg.create_task(self._process_gemini_responses())
+        except* Exception as eg:
+            for e in eg.exceptions:
+                logger.error("Pipeline task failed: %s", e)
+        
+    async def process_audio_input(self, audio_data: Union[bytes, memoryview]):
+        """Process incoming audio data (copied straight into a ring slot)"""
         if not self.is_running:
             return
             
-        start_time = time.time()
         self.audio_chunks_received += 1
         
         try:
-            # Add to buffer for processing (non-blocking)
-            if not self.audio_buffer.full():
-                await self.audio_buffer.put(audio_data)
-            else:
-                # Drop oldest audio if buffer is full (maintain low latency)
-                try:
-                    self.audio_buffer.get_nowait()
-                    await self.audio_buffer.put(audio_data)
-                except asyncio.QueueEmpty:
-                    pass
+            if SETTINGS.skip_silent_audio:
+                if _is_voiced(audio_data):
+                    self._silent_bytes = 0
+                elif self._silent_bytes >= self._hangover_bytes:
+                    # Already past the hangover: skip the queue entirely
+                    self.audio_chunks_skipped += 1
+                    return
+                else:
+                    self._silent_bytes += len(audio_data)
+            
+            # Never write over a slot whose memoryview is still being sent;
+            # if the ring has wrapped onto one, this chunk has nowhere to go
+            if self._head - self._claimed >= AUDIO_RING_SLOTS:
+                self.audio_chunks_dropped += 1
+                return
+            
+            # Keep at most a ring minus two batches unsent (maintain low latency)
+            if self._head - self._tail >= AUDIO_MAX_UNSENT:
+                # Drop oldest unsent audio
+                self._pending_len -= self._lens[self._tail % AUDIO_RING_SLOTS]
+                self._tail += 1
+                self.audio_chunks_dropped += 1
+            
+            index = self._head % AUDIO_RING_SLOTS
+            size = len(audio_data)
+            if size > self._slot_size:
+                self._grow_slots(size)
+            self._slots[index][:size] = audio_data
+            self._lens[index] = size
+            self._pending_len += size
+            self._head += 1
+            self._data_event.set()
                     
         except Exception as e:
-            logger.error(f"Error processing audio input: {e}")
+            logger.error("Error processing audio input: %s", e)
             
+    def _grow_slots(self, size: int):
+        """Resize every ring slot to fit the client's frame size"""
+        # Clients send fixed-size frames, so this runs once per session.
+        # Buffered chunks are carried over; memoryviews already claimed by
+        # the consumer keep the old buffers. Replace in place because the
+        # consumer holds a reference to this list.
+        for i, length in enumerate(self._lens):
+            grown = bytearray(size)
+            grown[:length] = self._slots[i][:length]
+            self._slots[i] = grown
+        self._slot_size = size
+        
     async def process_text_input(self, text: str):
         """Process incoming text input"""
         if not self.is_running:
@@ -143,30 +270,77 @@ class LowLatencyAudioPipeline:
             
         try:
             await self.gemini_service.send_text(text)
-            logger.info(f"Sent text to Gemini: {text}")
+            logger.info("Sent text to Gemini: %s", text)
         except Exception as e:
-            logger.error(f"Error sending text: {e}")
+            logger.error("Error sending text: %s", e)
             
     async def _process_audio_input(self):
         """Process audio from buffer and send to Gemini"""
-        while self.is_running:
-            try:
-                # Get audio from buffer with timeout
-                audio_data = await asyncio.wait_for(
-                    self.audio_buffer.get(), 
-                    timeout=0.1
-                )
-                
-                # Send to Gemini Live API
-                await self.gemini_service.send_audio(audio_data)
-                self.audio_chunks_sent += 1
-                
-            except asyncio.TimeoutError:
-                # No audio available, continue
-                continue
-            except Exception as e:
-                logger.error(f"Error processing audio: {e}")
-                await asyncio.sleep(0.01)
+        # Bound methods hoisted out of the loop
+        wait_for_data = self._data_event.wait
+        clear_data = self._data_event.clear
+        send_audio_batch = self.gemini_service.send_audio_batch
+        slots = self._slots
+        lens = self._lens
+        target_bytes = int(SETTINGS.input_sample_rate * 2 * AUDIO_COALESCE_WINDOW)
+        # Small client frames may never add up to target_bytes; stop waiting
+        # once a full batch is buffered or the producer would start dropping
+        flush_slots = min(AUDIO_SEND_BATCH, AUDIO_MAX_UNSENT)
+        
+        def coalescing():
+            return self._pending_len < target_bytes and self._head - self._tail < flush_slots
+        
+        # One send stays in flight while the next batch is gathered
+        pending = None
+        
+        try:
+            while self.is_running:
+                try:
+                    # Edge-triggered wait: set by the producer or by stop()
+                    await wait_for_data()
+                    clear_data()
+                    
+                    # Hold back small chunks briefly so each upstream message
+                    # carries a useful amount of audio
+                    if coalescing():
+                        try:
+                            async with asyncio.timeout(AUDIO_COALESCE_WINDOW):
+                                while self.is_running and coalescing():
+                                    await wait_for_data()
+                                    clear_data()
+                        except TimeoutError:
+                            pass
+                    
+                    # Drain every chunk that arrived since the last wakeup
+                    while self.is_running and self._head != self._tail:
+                        # Claim up to a batch of the oldest slots; the producer
+                        # leaves them alone until their send has finished
+                        start = self._tail
+                        count = min(self._head - self._tail, AUDIO_SEND_BATCH)
+                        chunks = []
+                        for _ in range(count):
+                            index = self._tail % AUDIO_RING_SLOTS
+                            self._tail += 1
+                            self._pending_len -= lens[index]
+                            chunks.append(memoryview(slots[index])[:lens[index]])
+                        
+                        # Send to Gemini Live API, then wait for the previous send
+                        previous = pending
+                        pending = asyncio.create_task(send_audio_batch(chunks))
+                        self.audio_chunks_sent += count
+                        if previous is not None:
+                            try:
+                                await previous
+                            finally:
+                                # Only the batch just claimed is still in flight
+                                self._claimed = start
+                    
+                except Exception as e:
+                    logger.error("Error processing audio: %s", e)
+                    await asyncio.sleep(0.01)
+        finally:
+            if pending is not None:
+                pending.cancel()
                 
     async def _process_gemini_responses(self):
         """Process responses from Gemini Live API"""
@@ -176,27 +350,83 @@ class LowLatencyAudioPipeline:
                     break
                     
                 # Track response time
-                response_time = time.time() - self.last_audio_time
-                self.response_times.append(response_time)
+                response_time_ns = time.monotonic_ns() - self.last_audio_time_ns
                 
-                # Keep only recent response times (last 100)
-                if len(self.response_times) > 100:
-                    self.response_times = self.response_times[-100:]
+                # Keep only recent response times
+                self._rt_buf[self._rt_i] = response_time_ns / 1e6
+                self._rt_i = (self._rt_i + 1) % RESPONSE_TIME_WINDOW
+                self._rt_n = min(self._rt_n + 1, RESPONSE_TIME_WINDOW)
                 
-                # Send response to WebSocket
-                await self._send_to_websocket(response)
+                # Hand the response to the writer task without waiting on the socket
+                self._enqueue(response)
                 
         except Exception as e:
-            logger.error(f"Error processing Gemini responses: {e}")
+            logger.error("Error processing Gemini responses: %s", e)
             await self.rtvi_service.handle_error(f"Gemini response error: {e}")
             
-    async def _send_to_websocket(self, data: Dict[str, Any]):
-        """Send data to WebSocket"""
-        if self.websocket and self.websocket.client_state == "connected":
+    def queue_message(self, message: Union[Dict[str, Any], orjson.Fragment]):
+        """Queue a JSON message for the client behind the pipeline's writer task"""
+        self._enqueue(message)
+        
+    def _enqueue(self, data: Union[Dict[str, Any], orjson.Fragment, bytes]):
+        """Queue an outbound message for the writer task; drops the oldest if the client lags"""
+        try:
+            self._out_q.put_nowait(data)
+        except asyncio.QueueFull:
+            self._out_q.get_nowait()
+            self._out_q.put_nowait(data)
+            self.messages_dropped += 1
+        
+    async def _writer_loop(self):
+        """Send queued messages, coalescing bursts into a single batch frame"""
+        # Bound methods hoisted out of the loop
+        queue_get = self._out_q.get
+        queue_get_nowait = self._out_q.get_nowait
+        send_text = self.websocket.send_text
+        send_bytes = self.websocket.send_bytes
+        dumps = orjson.dumps
+        connected = WebSocketState.CONNECTED
+        
+        async def send_messages(messages):
+            # orjson encodes straight to UTF-8
+            if len(messages) > 1 and self.batch_messages:
+                await send_text(dumps({"type": "batch", "items": messages}).decode())
+            else:
+                # Clients that did not opt in get one frame per message
+                for message in messages:
+                    await send_text(dumps(message).decode())
+        
+        while True:
+            message = await queue_get()
+            
+            # Give closely spaced events a moment to arrive, then drain
+            await asyncio.sleep(SEND_COALESCE_WINDOW)
+            batch = [message]
+            while len(batch) < MAX_SEND_BATCH:
+                try:
+                    batch.append(queue_get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            if self.websocket.client_state is not connected:
+                continue
+                
             try:
-                await self.websocket.send_json(data)
+                # Raw PCM goes out as binary frames, which clients play as
+                # audio; JSON messages in between share one text frame
+                messages = []
+                for item in batch:
+                    if isinstance(item, (bytes, bytearray, memoryview)):
+                        if messages:
+                            await send_messages(messages)
+                            messages = []
+                        await send_bytes(item)
+                    else:
+                        messages.append(item)
+                if messages:
+                    await send_messages(messages)
             except Exception as e:
-                logger.error(f"Error sending to WebSocket: {e}")
+                logger.error("Error sending to WebSocket: %s", e)
                 
     async def _handle_audio_input(self, data: Dict[str, Any]):
         """Handle audio input RTVI event"""
@@ -204,47 +434,38 @@ class LowLatencyAudioPipeline:
             await self.process_audio_input(data["audio_data"])
             
     async def _handle_audio_output(self, data: Dict[str, Any]):
-        """Handle audio output RTVI event"""
-        await self._send_to_websocket({
-            "type": "audio-output",
-            "data": data
-        })
+        """Handle audio output RTVI event; PCM is relayed as a binary frame"""
+        self._enqueue(data["audio_data"])
+        
+    async def _forward_event(self, event_name: str, data: Dict[str, Any]):
+        """Relay an RTVI event to the client"""
+        self._enqueue({"type": event_name, "data": data})
         
     async def _handle_user_speaking(self, data: Dict[str, Any]):
         """Handle user speaking RTVI event"""
-        self.last_audio_time = time.time()
-        await self._send_to_websocket({
-            "type": "user-speaking",
-            "data": data
-        })
-        
-    async def _handle_bot_speaking(self, data: Dict[str, Any]):
-        """Handle bot speaking RTVI event"""
-        await self._send_to_websocket({
-            "type": "bot-speaking", 
-            "data": data
-        })
-        
-    async def _handle_error(self, data: Dict[str, Any]):
-        """Handle error RTVI event"""
-        await self._send_to_websocket({
-            "type": "error",
-            "data": data
-        })
+        self.last_audio_time_ns = time.monotonic_ns()
+        self._enqueue({"type": "user-speaking", "data": data})
         
     async def get_status(self) -> Dict[str, Any]:
         """Get pipeline status"""
-        avg_response_time = 0
-        if self.response_times:
-            avg_response_time = sum(self.response_times) / len(self.response_times)
+        avg_response_time_ms = 0
+        p99_response_time_ms = 0
+        if self._rt_n:
+            recent = self._rt_buf[:self._rt_n]
+            avg_response_time_ms = float(recent.mean())
+            p99_response_time_ms = float(np.percentile(recent, 99))
             
         return {
             "is_running": self.is_running,
             "gemini_connected": self.gemini_service.is_connected,
             "audio_chunks_received": self.audio_chunks_received,
             "audio_chunks_sent": self.audio_chunks_sent,
-            "buffer_size": self.audio_buffer.qsize(),
-            "avg_response_time_ms": avg_response_time * 1000,
+            "audio_chunks_dropped": self.audio_chunks_dropped,
+            "audio_chunks_skipped": self.audio_chunks_skipped,
+            "messages_dropped": self.messages_dropped,
+            "buffer_size": self._head - self._tail,
+            "avg_response_time_ms": avg_response_time_ms,
+            "p99_response_time_ms": p99_response_time_ms,
             "form_status": self.gemini_service.get_form_status()
         }
         
@@ -2,12 +2,17 @@
 WebSocket routes for real-time audio streaming
 """
 import asyncio
-import json
+import base64
+import itertools
 import logging
 import re
-from typing import Dict, Any
+import time
+import orjson
+from dataclasses import dataclass
+from typing import Dict, Any, Union
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.websockets import WebSocketState
+from config import SETTINGS
 from pipelines.audio_pipeline import LowLatencyAudioPipeline
 from utils.logger import setup_logger
 
@@ -15,72 +20,128 @@ logger = logging.getLogger(__name__)
 
 websocket_router = APIRouter()
 
+# Reply timestamps; same monotonic clock as loop.time() without the loop lookup
+_now = time.monotonic
+
+# Voice command phrases, matched as substrings of the lowercased text
+FORM_TAB_PHRASES = frozenset({"open voice form", "switch to form", "go to form", "show form"})
+STREAM_TAB_PHRASES = frozenset({"open voice stream", "switch to stream", "go to stream", "show stream"})
+SUBMIT_PHRASES = frozenset({"submit", "send form", "send it", "submit form", "send the form", "i'm done", "finished", "complete", "done"})
+CLEAR_PHRASES = frozenset({"clear", "reset", "clear form", "reset form", "start over", "clear all", "reset all", "clear everything"})
+
+# Form filling patterns, compiled once at import
+EMAIL_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:my email is|email is|my email address is|email address)\s+([^\s]+@[^\s]+\.[^\s]+)",
+    r"(?:set email to|put email as)\s+([^\s]+@[^\s]+\.[^\s]+)",
+    r"(?:email)\s+([^\s]+@[^\s]+\.[^\s]+)"
+))
+MESSAGE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:my message is|message is|i want to say|tell them)\s+(.+)",
+    r"(?:set message to|put message as)\s+(.+)",
+    r"(?:message)\s+(.+)"
+))
+NAME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"(?:my name is|i am|i'm|name is|call me)\s+([a-zA-Z\s]+)",
+    r"(?:set name to|put name as)\s+([a-zA-Z\s]+)",
+    r"(?:^name\s+)([a-zA-Z\s]+)"  # Only match "name" at the beginning
+))
+
+# One combined scan per pattern group; the individual patterns only run on a hit
+EMAIL_PREFILTER = re.compile("|".join(f"(?:{p.pattern})" for p in EMAIL_PATTERNS), re.IGNORECASE)
+MESSAGE_PREFILTER = re.compile("|".join(f"(?:{p.pattern})" for p in MESSAGE_PATTERNS), re.IGNORECASE)
+NAME_PREFILTER = re.compile("|".join(f"(?:{p.pattern})" for p in NAME_PATTERNS), re.IGNORECASE)
+
+async def send_json_message(websocket: WebSocket, message: Dict[str, Any]):
+    """Send a JSON text frame encoded with orjson"""
+    await websocket.send_text(orjson.dumps(message).decode())
+
+# Fixed replies, encoded once at import
+INVALID_JSON_MESSAGE = orjson.Fragment(orjson.dumps({
+    "type": "error",
+    "error": "Invalid JSON format",
+    "message": "Message must be valid JSON"
+}))
+TEXT_QUEUE_FULL_MESSAGE = orjson.Fragment(orjson.dumps({
+    "type": "error",
+    "error": "Too many pending messages",
+    "message": "Message dropped; send fewer messages at once"
+}))
+
+# Text frames buffered per client before new ones are rejected
+TEXT_QUEUE_SIZE = 64
+
+@dataclass(slots=True)
+class Connection:
+    """A client socket and its audio pipeline"""
+    websocket: WebSocket
+    pipeline: LowLatencyAudioPipeline
+
 # Connection manager for WebSocket connections
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.pipelines: Dict[str, LowLatencyAudioPipeline] = {}
+        self.connections: Dict[int, Connection] = {}
     
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: int, pipeline: LowLatencyAudioPipeline):
         """Accept WebSocket connection"""
         await websocket.accept()
-        self.active_connections[client_id] = websocket
-        logger.info(f"WebSocket connection established for client: {client_id}")
+        self.connections[client_id] = Connection(websocket, pipeline)
+        logger.info("WebSocket connection established for client: %s", client_id)
     
-    async def disconnect(self, client_id: str):
+    async def disconnect(self, client_id: int):
         """Disconnect WebSocket connection"""
-        if client_id in self.active_connections:
-            # Stop pipeline if exists
-            if client_id in self.pipelines:
-                await self.pipelines[client_id].stop()
-                del self.pipelines[client_id]
-            
-            # Remove connection
-            del self.active_connections[client_id]
-            logger.info(f"WebSocket connection closed for client: {client_id}")
+        # Remove connection before awaiting so concurrent callers see it gone
+        connection = self.connections.pop(client_id, None)
+        if connection is not None:
+            await connection.pipeline.stop()
+            logger.info("WebSocket connection closed for client: %s", client_id)
     
-    async def send_message(self, client_id: str, message: Dict[str, Any]):
+    async def send_message(self, client_id: int, message: Dict[str, Any]):
         """Send message to specific client"""
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            if websocket.client_state == WebSocketState.CONNECTED:
-                await websocket.send_json(message)
+        connection = self.connections.get(client_id)
+        if connection is None:
+            return
+        # Go through the client's writer task so sends never interleave
+        connection.pipeline.queue_message(message)
     
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast message to all connected clients"""
+        # Encode once; every recipient's writer sends the same bytes
+        fragment = orjson.Fragment(orjson.dumps(message))
+        
         disconnected_clients = []
-        for client_id, websocket in self.active_connections.items():
-            try:
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json(message)
-                else:
-                    disconnected_clients.append(client_id)
-            except Exception as e:
-                logger.error(f"Error sending message to client {client_id}: {e}")
+        for client_id, connection in self.connections.items():
+            client_state = connection.websocket.client_state
+            if client_state == WebSocketState.DISCONNECTED:
                 disconnected_clients.append(client_id)
+            elif client_state == WebSocketState.CONNECTED:
+                # Go through the client's writer task so sends never interleave;
+                # clients still handshaking are skipped
+                connection.pipeline.queue_message(fragment)
         
         # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            await self.disconnect(client_id)
+        await asyncio.gather(*(self.disconnect(client_id) for client_id in disconnected_clients))
 
 # Global connection manager
 manager = ConnectionManager()
 
+# Client IDs are never reused within a process, unlike id(websocket)
+_client_ids = itertools.count(1)
+
 async def process_voice_command(text: str) -> Dict[str, Any]:
     """Process voice commands locally without requiring Gemini API"""
     try:
         lower_text = text.lower().strip()
-        logger.info(f"Processing voice command: {text}")
+        logger.debug("Processing voice command: %s", text)
         
         # Tab switching commands
-        if any(phrase in lower_text for phrase in ["open voice form", "switch to form", "go to form", "show form"]):
+        if any(phrase in lower_text for phrase in FORM_TAB_PHRASES):
             return {
                 "action": "switch_tab",
                 "tab": "form",
                 "message": "Switching to Voice Form tab"
             }
         
-        if any(phrase in lower_text for phrase in ["open voice stream", "switch to stream", "go to stream", "show stream"]):
+        if any(phrase in lower_text for phrase in STREAM_TAB_PHRASES):
             return {
                 "action": "switch_tab", 
                 "tab": "stream",
@@ -88,17 +149,11 @@ async def process_voice_command(text: str) -> Dict[str, Any]:
             }
         
         # Form filling commands - check email first (most specific)
-        email_patterns = [
-            r"(?:my email is|email is|my email address is|email address)\s+([^\s]+@[^\s]+\.[^\s]+)",
-            r"(?:set email to|put email as)\s+([^\s]+@[^\s]+\.[^\s]+)",
-            r"(?:email)\s+([^\s]+@[^\s]+\.[^\s]+)"
-        ]
-        
-        for pattern in email_patterns:
-            match = re.search(pattern, lower_text)
+        for pattern in (EMAIL_PATTERNS if EMAIL_PREFILTER.search(lower_text) else ()):
+            match = pattern.search(lower_text)
             if match:
                 email = match.group(1).strip()
-                logger.info(f"EMAIL PATTERN MATCHED: {pattern} -> {email}")
+                logger.debug("EMAIL PATTERN MATCHED: %s -> %s", pattern.pattern, email)
                 return {
                     "action": "fill_field",
                     "field": "email", 
@@ -107,14 +162,8 @@ async def process_voice_command(text: str) -> Dict[str, Any]:
                 }
         
         # Check message patterns (more specific than name)
-        message_patterns = [
-            r"(?:my message is|message is|i want to say|tell them)\s+(.+)",
-            r"(?:set message to|put message as)\s+(.+)",
-            r"(?:message)\s+(.+)"
-        ]
-        
-        for pattern in message_patterns:
-            match = re.search(pattern, lower_text)
+        for pattern in (MESSAGE_PATTERNS if MESSAGE_PREFILTER.search(lower_text) else ()):
+            match = pattern.search(lower_text)
             if match:
                 message = match.group(1).strip()
                 return {
@@ -125,17 +174,11 @@ async def process_voice_command(text: str) -> Dict[str, Any]:
                 }
         
         # Check name patterns last (most general)
-        name_patterns = [
-            r"(?:my name is|i am|i'm|name is|call me)\s+([a-zA-Z\s]+)",
-            r"(?:set name to|put name as)\s+([a-zA-Z\s]+)",
-            r"(?:^name\s+)([a-zA-Z\s]+)"  # Only match "name" at the beginning
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, lower_text)
+        for pattern in (NAME_PATTERNS if NAME_PREFILTER.search(lower_text) else ()):
+            match = pattern.search(lower_text)
             if match:
                 name = match.group(1).strip()
-                logger.info(f"NAME PATTERN MATCHED: {pattern} -> {name}")
+                logger.debug("NAME PATTERN MATCHED: %s -> %s", pattern.pattern, name)
                 return {
                     "action": "fill_field",
                     "field": "name",
@@ -144,16 +187,14 @@ async def process_voice_command(text: str) -> Dict[str, Any]:
                 }
         
         # Submit commands
-        submit_patterns = ["submit", "send form", "send it", "submit form", "send the form", "i'm done", "finished", "complete", "done"]
-        if any(pattern in lower_text for pattern in submit_patterns):
+        if any(phrase in lower_text for phrase in SUBMIT_PHRASES):
             return {
                 "action": "submit_form",
                 "message": "Submit the form"
             }
         
         # Clear commands
-        clear_patterns = ["clear", "reset", "clear form", "reset form", "start over", "clear all", "reset all", "clear everything"]
-        if any(pattern in lower_text for pattern in clear_patterns):
+        if any(phrase in lower_text for phrase in CLEAR_PHRASES):
             return {
                 "action": "clear_form",
                 "message": "Clear the form"
@@ -166,7 +207,7 @@ async def process_voice_command(text: str) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        logger.error(f"Error processing voice command: {e}")
+        logger.error("Error processing voice command: %s", e)
         return {
             "action": "error",
             "message": f"Error processing command: {str(e)}"
@@ -178,25 +219,32 @@ async def websocket_endpoint(websocket: WebSocket):
     WebSocket endpoint for real-time audio streaming with RTVI protocol support
     """
     client_id = None
-    pipeline = None
+    
+    # Only WebSocket sessions count towards the limit; plain HTTP is unaffected
+    if len(manager.connections) >= SETTINGS.max_connections:
+        logger.warning("Rejecting WebSocket connection: %s sessions open", len(manager.connections))
+        # Closing before accept() is an HTTP 403; accept first so the client
+        # sees 1013 "try again later"
+        await websocket.accept()
+        await websocket.close(code=1013)
+        return
+    
+    # Take the slot before the first await so concurrent handshakes cannot
+    # overshoot max_connections. The pipeline is registered with it so that
+    # disconnect stops it even if initialization fails.
+    client_id = next(_client_ids)
+    pipeline = LowLatencyAudioPipeline()
+    manager.connections[client_id] = Connection(websocket, pipeline)
     
     try:
         # Accept connection
         await websocket.accept()
         
-        # Generate client ID
-        client_id = f"client_{id(websocket)}"
-        
-        # Add to connection manager
-        manager.active_connections[client_id] = websocket
-        
-        # Create and initialize audio pipeline
-        pipeline = LowLatencyAudioPipeline()
-        await pipeline.initialize(websocket)
-        manager.pipelines[client_id] = pipeline
+        # Clients opt in to coalesced batch frames with ?batch=1
+        await pipeline.initialize(websocket, batch_messages=websocket.query_params.get("batch") == "1")
         
         # Send initial connection message
-        await websocket.send_json({
+        await send_json_message(websocket, {
             "type": "connection_established",
             "client_id": client_id,
             "message": "Connected to real-time audio streaming service"
@@ -209,11 +257,11 @@ async def websocket_endpoint(websocket: WebSocket):
         await handle_websocket_messages(websocket, client_id, pipeline)
         
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected for client: {client_id}")
+        logger.info("WebSocket disconnected for client: %s", client_id)
     except Exception as e:
-        logger.error(f"WebSocket error for client {client_id}: {e}")
+        logger.error("WebSocket error for client %s: %s", client_id, e)
         try:
-            await websocket.send_json({
+            await send_json_message(websocket, {
                 "type": "error",
                 "error": str(e),
                 "message": "An error occurred in the WebSocket connection"
@@ -221,14 +269,19 @@ async def websocket_endpoint(websocket: WebSocket):
         except:
             pass
     finally:
-        # Cleanup
+        # Cleanup; disconnect also stops the client's pipeline
         if client_id:
             await manager.disconnect(client_id)
-        if pipeline:
-            await pipeline.stop()
 
-async def handle_websocket_messages(websocket: WebSocket, client_id: str, pipeline: LowLatencyAudioPipeline):
+async def handle_websocket_messages(websocket: WebSocket, client_id: int, pipeline: LowLatencyAudioPipeline):
     """Handle incoming WebSocket messages"""
+    # Audio received since the last audio_stats ack
+    ack_state = {"bytes": 0, "chunks": 0, "last": _now()}
+    
+    # Text frames are handled by their own task so audio never waits on them
+    text_queue: asyncio.Queue = asyncio.Queue(maxsize=TEXT_QUEUE_SIZE)
+    text_task = asyncio.create_task(handle_text_frames(text_queue, pipeline, websocket))
+    
     try:
         while True:
             # Receive message
@@ -236,53 +289,77 @@ async def handle_websocket_messages(websocket: WebSocket, client_id: str, pipeli
             
             # Handle different message types
             if message["type"] == "websocket.receive":
-                if "bytes" in message:
-                    # Handle binary audio data
-                    audio_data = message["bytes"]
-                    await handle_audio_data(audio_data, pipeline, websocket)
-                
-                elif "text" in message:
-                    # Handle text messages
-                    try:
-                        data = json.loads(message["text"])
-                        await handle_text_message(data, pipeline, websocket)
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Invalid JSON message: {e}")
-                        await websocket.send_json({
-                            "type": "error",
-                            "error": "Invalid JSON format",
-                            "message": "Message must be valid JSON"
-                        })
+                audio_bytes = message.get("bytes")
+                if audio_bytes is not None:
+                    # Handle binary audio data without copying the frame
+                    await handle_audio_data(memoryview(audio_bytes), pipeline, websocket, ack_state)
+                else:
+                    text = message.get("text")
+                    if text is not None:
+                        try:
+                            text_queue.put_nowait(text)
+                        except asyncio.QueueFull:
+                            # Keep earlier frames in order and reject the new one
+                            logger.warning("Text queue full for client %s; dropping message", client_id)
+                            pipeline.queue_message(TEXT_QUEUE_FULL_MESSAGE)
             
             elif message["type"] == "websocket.disconnect":
                 break
                 
     except WebSocketDisconnect:
-        logger.info(f"Client {client_id} disconnected")
+        logger.info("Client %s disconnected", client_id)
     except Exception as e:
-        logger.error(f"Error handling WebSocket messages for client {client_id}: {e}")
-        await websocket.send_json({
+        logger.error("Error handling WebSocket messages for client %s: %s", client_id, e)
+        pipeline.queue_message({
             "type": "error",
             "error": str(e),
             "message": "Error processing message"
         })
+    finally:
+        text_task.cancel()
+        try:
+            await text_task
+        except asyncio.CancelledError:
+            pass
+
+async def handle_text_frames(text_queue: asyncio.Queue, pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+    """Parse and handle queued text frames in arrival order"""
+    while True:
+        text = await text_queue.get()
+        try:
+            data = orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid JSON message: %s", e)
+            pipeline.queue_message(INVALID_JSON_MESSAGE)
+            continue
+        await handle_text_message(data, pipeline, websocket)
 
-async def handle_audio_data(audio_data: bytes, pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+async def handle_audio_data(audio_data: Union[bytes, memoryview], pipeline: LowLatencyAudioPipeline, websocket: WebSocket, ack_state: Dict[str, Any]):
     """Handle incoming audio data"""
     try:
         # Process audio through pipeline
         await pipeline.process_audio_input(audio_data)
         
-        # Send acknowledgment
-        await websocket.send_json({
-            "type": "audio_received",
-            "size": len(audio_data),
-            "timestamp": asyncio.get_event_loop().time()
-        })
+        # Acknowledge received audio at most once per interval
+        interval = SETTINGS.audio_ack_interval
+        if interval > 0:
+            ack_state["bytes"] += len(audio_data)
+            ack_state["chunks"] += 1
+            now = _now()
+            if now - ack_state["last"] >= interval:
+                pipeline.queue_message({
+                    "type": "audio_stats",
+                    "bytes": ack_state["bytes"],
+                    "chunks": ack_state["chunks"],
+                    "timestamp": now
+                })
+                ack_state["bytes"] = 0
+                ack_state["chunks"] = 0
+                ack_state["last"] = now
         
     except Exception as e:
-        logger.error(f"Error handling audio data: {e}")
-        await websocket.send_json({
+        logger.error("Error handling audio data: %s", e)
+        pipeline.queue_message({
             "type": "error",
             "error": str(e),
             "message": "Error processing audio data"
@@ -292,94 +369,93 @@ async def handle_text_message(data: Dict[str, Any], pipeline: LowLatencyAudioPip
     """Handle incoming text messages"""
     try:
         message_type = data.get("type")
+        handler = TEXT_MESSAGE_HANDLERS.get(message_type)
         
-        if message_type == "text_input":
-            # Handle text input
-            text = data.get("text", "")
-            if text:
-                # Process voice commands locally first
-                response = await process_voice_command(text)
-                logger.info(f"Processing voice command: {text} -> {response}")
-                
-                # Send voice command response
-                await websocket.send_json({
-                    "type": "voice_command_response",
-                    "command": text,
-                    "response": response,
-                    "timestamp": asyncio.get_event_loop().time()
-                })
-                
-                # Only send to Gemini if the local command wasn't recognized
-                if response.get("action") == "unknown":
-                    logger.info("Local command not recognized, sending to Gemini")
-                    await pipeline.process_text_input(text)
-                else:
-                    logger.info("Local command recognized, skipping Gemini")
-                
-                # Send text received confirmation
-                await websocket.send_json({
-                    "type": "text_received",
-                    "text": text,
-                    "timestamp": asyncio.get_event_loop().time()
-                })
-        
-        elif message_type == "config":
-            # Handle configuration update
-            config = data.get("config", {})
-            await handle_config_update(config, pipeline, websocket)
-        
-        elif message_type == "status_request":
-            # Handle status request
-            status = await pipeline.get_status()
-            await websocket.send_json({
-                "type": "status_response",
-                "status": status,
-                "timestamp": asyncio.get_event_loop().time()
-            })
-        
-        elif message_type == "ping":
-            # Handle ping
-            await websocket.send_json({
-                "type": "pong",
-                "timestamp": asyncio.get_event_loop().time()
-            })
-        
-        elif message_type == "rtvi_message":
-            # Handle RTVI protocol messages
-            await handle_rtvi_message(data, pipeline, websocket)
-        
-        else:
-            logger.warning(f"Unknown message type: {message_type}")
-            await websocket.send_json({
+        if handler is None:
+            logger.warning("Unknown message type: %s", message_type)
+            pipeline.queue_message({
                 "type": "error",
                 "error": "Unknown message type",
                 "message": f"Message type '{message_type}' is not supported"
             })
+        else:
+            await handler(data, pipeline, websocket)
         
     except Exception as e:
-        logger.error(f"Error handling text message: {e}")
-        await websocket.send_json({
+        logger.error("Error handling text message: %s", e)
+        pipeline.queue_message({
             "type": "error",
             "error": str(e),
             "message": "Error processing text message"
         })
 
+async def handle_text_input(data: Dict[str, Any], pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+    """Handle text input, trying local voice commands before Gemini"""
+    text = data.get("text", "")
+    if text:
+        # Process voice commands locally first
+        response = await process_voice_command(text)
+        logger.debug("Processing voice command: %s -> %s", text, response)
+        
+        if response.get("action") == "unknown":
+            # Not a local command: hand it to Gemini; the receipt below is
+            # the only reply
+            logger.debug("Local command not recognized, sending to Gemini")
+            await pipeline.process_text_input(text)
+        else:
+            # Recognized locally (or failed to parse): reply with the result
+            logger.debug("Local command recognized, skipping Gemini")
+            pipeline.queue_message({
+                "type": "voice_command_response",
+                "command": text,
+                "response": response,
+                "timestamp": _now()
+            })
+        
+        # Send text received confirmation
+        pipeline.queue_message({
+            "type": "text_received",
+            "text": text,
+            "timestamp": _now()
+        })
+
+async def handle_config_message(data: Dict[str, Any], pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+    """Handle configuration message"""
+    config = data.get("config", {})
+    await handle_config_update(config, pipeline, websocket)
+
+async def handle_status_request(data: Dict[str, Any], pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+    """Handle status request"""
+    status = await pipeline.get_status()
+    pipeline.queue_message({
+        "type": "status_response",
+        "status": status,
+        "timestamp": _now()
+    })
+
+async def handle_ping(data: Dict[str, Any], pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
+    """Handle ping"""
+    pipeline.queue_message({
+        "type": "pong",
+        "timestamp": _now()
+    })
+
 async def handle_config_update(config: Dict[str, Any], pipeline: LowLatencyAudioPipeline, websocket: WebSocket):
     """Handle configuration updates"""
     try:
         # Update pipeline configuration
         # This is a simplified implementation - extend as needed
-        logger.info(f"Configuration update requested: {config}")
+        logger.info("Configuration update requested: %s", config)
         
-        await websocket.send_json({
+        pipeline.queue_message({
             "type": "config_updated",
             "config": config,
             "message": "Configuration updated successfully"
         })
         
     except Exception as e:
-        logger.error(f"Error updating configuration: {e}")
-        await websocket.send_json({
+        logger.error("Error updating configuration: %s", e)
+        pipeline.queue_message({
             "type": "error",
             "error": str(e),
             "message": "Error updating configuration"
@@ -391,57 +467,80 @@ async def handle_rtvi_message(data: Dict[str, Any], pipeline: LowLatencyAudioPip
         rtvi_data = data.get("rtvi_data", {})
         event_type = rtvi_data.get("type")
         
-        if event_type == "client_ready":
-            await pipeline.rtvi_service.handle_client_ready()
-        
-        elif event_type == "audio_input":
-            # Handle RTVI audio input
-            audio_data = bytes.fromhex(rtvi_data.get("audio_data", ""))
-            if audio_data:
-                await pipeline.process_audio_input(audio_data)
-        
-        elif event_type == "transport_state":
-            # Handle transport state messages
-            state = rtvi_data.get("state")
-            logger.info(f"RTVI transport state: {state}")
+        handler = RTVI_EVENT_HANDLERS.get(event_type)
+        if handler is not None:
+            await handler(rtvi_data, pipeline)
         
-        await websocket.send_json({
+        pipeline.queue_message({
             "type": "rtvi_message_received",
             "event_type": event_type,
-            "timestamp": asyncio.get_event_loop().time()
+            "timestamp": _now()
         })
         
     except Exception as e:
-        logger.error(f"Error handling RTVI message: {e}")
-        await websocket.send_json({
+        logger.error("Error handling RTVI message: %s", e)
+        pipeline.queue_message({
             "type": "error",
             "error": str(e),
             "message": "Error processing RTVI message"
         })
 
+async def handle_rtvi_client_ready(rtvi_data: Dict[str, Any], pipeline: LowLatencyAudioPipeline):
+    """Handle RTVI client ready event"""
+    await pipeline.rtvi_service.handle_client_ready()
+
+async def handle_rtvi_audio_input(rtvi_data: Dict[str, Any], pipeline: LowLatencyAudioPipeline):
+    """Handle RTVI audio input (base64 PCM; raw audio should use binary frames)"""
+    audio_data = base64.b64decode(rtvi_data.get("audio_data", ""))
+    if audio_data:
+        await pipeline.process_audio_input(audio_data)
+
+async def handle_rtvi_transport_state(rtvi_data: Dict[str, Any], pipeline: LowLatencyAudioPipeline):
+    """Handle RTVI transport state event"""
+    state = rtvi_data.get("state")
+    logger.info("RTVI transport state: %s", state)
+
+# Text message handlers by message type
+TEXT_MESSAGE_HANDLERS = {
+    "text_input": handle_text_input,
+    "config": handle_config_message,
+    "status_request": handle_status_request,
+    "ping": handle_ping,
+    "rtvi_message": handle_rtvi_message,
+}
+
+# RTVI event handlers by event type; other events are only acknowledged
+RTVI_EVENT_HANDLERS = {
+    "client_ready": handle_rtvi_client_ready,
+    "audio_input": handle_rtvi_audio_input,
+    "transport_state": handle_rtvi_transport_state,
+}
+
 # Additional REST endpoints for WebSocket management
 @websocket_router.get("/ws/connections")
 async def get_active_connections():
     """Get information about active WebSocket connections"""
     try:
+        # Snapshot first; clients may disconnect while statuses are gathered
+        connections = tuple(manager.connections.items())
+        statuses = await asyncio.gather(*(
+            connection.pipeline.get_status() for _, connection in connections
+        ))
+        
         connections_info = []
-        for client_id, websocket in manager.active_connections.items():
-            pipeline_status = {}
-            if client_id in manager.pipelines:
-                pipeline_status = await manager.pipelines[client_id].get_status()
-            
+        for (client_id, connection), status in zip(connections, statuses):
             connections_info.append({
                 "client_id": client_id,
-                "state": websocket.client_state.name,
-                "pipeline_status": pipeline_status
+                "state": connection.websocket.client_state.name,
+                "pipeline_status": status
             })
         
         return {
-            "active_connections": len(manager.active_connections),
+            "active_connections": len(connections),
             "connections": connections_info
         }
     except Exception as e:
-        logger.error(f"Error getting connections info: {e}")
+        logger.error("Error getting connections info: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @websocket_router.post("/ws/broadcast")
@@ -451,8 +550,8 @@ async def broadcast_message(message: Dict[str, Any]):
         await manager.broadcast(message)
         return {
             "message": "Message broadcasted successfully",
-            "recipients": len(manager.active_connections)
+            "recipients": len(manager.connections)
         }
     except Exception as e:
-        logger.error(f"Error broadcasting message: {e}")
+        logger.error("Error broadcasting message: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
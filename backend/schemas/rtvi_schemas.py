@@ -1,7 +1,7 @@
 """
 RTVI protocol schema definitions
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Union, Any
 from enum import Enum
 
@@ -76,7 +76,11 @@ class RTVIErrorMessage(RTVIMessage):
 
 class RTVIAudioMessage(RTVIMessage):
     """Audio data message"""
-    audio_data: bytes = Field(..., description="Audio data")
+    # memoryview is accepted as-is (isinstance check only) so frames pass
+    # through without being copied into bytes
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    audio_data: Union[bytes, memoryview] = Field(..., description="Audio data")
     format: str = Field(..., description="Audio format")
     sample_rate: int = Field(..., description="Sample rate")
     channels: int = Field(default=1, description="Number of channels")
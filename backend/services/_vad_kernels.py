@@ -0,0 +1,53 @@
+"""
+Voice activity kernels, JIT-compiled with numba when it is installed
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+def _vad_bits_numpy(samples: np.ndarray, sub: int, thr_sq: int) -> int:
+    """Pack one bit per voiced sub-frame, newest in the lowest bit"""
+    # Split into sub-frames (a short chunk is one sub-frame) and take each
+    # one's sum of squares
+    rows = samples.size // sub
+    if rows:
+        frames = samples[:rows * sub].reshape(rows, sub)
+    else:
+        rows = 1
+        frames = samples.reshape(1, -1)
+    frames = frames.astype(np.float32)
+    energy = np.einsum("ij,ij->i", frames, frames)
+
+    voiced = energy > thr_sq * frames.shape[1]
+    return int.from_bytes(np.packbits(voiced).tobytes(), "big") >> (-rows % 8)
+
+def _vad_bits_loop(samples: np.ndarray, sub: int, thr_sq: int) -> int:
+    """Same as _vad_bits_numpy as one fused square/sum/compare loop for numba"""
+    rows = samples.size // sub
+    if rows == 0:
+        rows = 1
+        sub = samples.size
+    limit = thr_sq * sub
+    out = 0
+    for i in range(rows):
+        acc = 0
+        base = i * sub
+        for j in range(sub):
+            v = np.int64(samples[base + j])
+            acc += v * v
+        # Bits beyond 64 sub-frames wrap away; callers mask to the history
+        out = (out << 1) | (1 if acc > limit else 0)
+    return out
+
+if numba is not None:
+    vad_bits = numba.njit(cache=True, fastmath=True)(_vad_bits_loop)
+    # Compile at import rather than on the first audio chunk. numba keys on
+    # writability: np.frombuffer over bytes is read-only, over a bytearray
+    # (ring slots) it is writable, so warm up both signatures.
+    vad_bits(np.frombuffer(bytes(4), dtype=np.int16), 1, 1)
+    vad_bits(np.frombuffer(bytearray(4), dtype=np.int16), 1, 1)
+else:
+    vad_bits = _vad_bits_numpy
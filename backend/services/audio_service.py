@@ -2,23 +2,191 @@
 Audio processing service
 """
 import asyncio
+import collections
+import concurrent.futures
 import logging
-from typing import Optional, AsyncGenerator, Callable
-import audioop
-from schemas.audio_schemas import AudioData, AudioFormat, AudioStreamConfig
-from config import get_settings
+import math
+import time
+from typing import Optional, AsyncGenerator, Callable, Union
+import numpy as np
+import soxr
+from schemas.audio_schemas import AudioData, AudioFormat, AudioStreamConfig, VoiceActivityDetection
+from config import SETTINGS
+from services._vad_kernels import vad_bits
 
 logger = logging.getLogger(__name__)
 
+# Audio chunks held in each buffer before the oldest are dropped
+AUDIO_BUFFER_CHUNKS = 256
+
+# Voice activity is decided per 10 ms sub-frame; one bit per sub-frame is
+# kept for the most recent VAD_HISTORY_BITS sub-frames. Onset looks only at
+# the newest VAD_ONSET_BITS so speech is picked up within one chunk
+VAD_SUBFRAMES_PER_SECOND = 100
+VAD_HISTORY_BITS = 64
+VAD_HISTORY_MASK = (1 << VAD_HISTORY_BITS) - 1
+VAD_ONSET_BITS = 4
+VAD_ONSET_MASK = (1 << VAD_ONSET_BITS) - 1
+
+# Adaptive stream chunking: while consumers need less than RTF_GROW of a
+# chunk's playback time to service it, chunks double; above RTF_SHRINK they
+# halve. Sizes stay within MIN/MAX_STREAM_CHUNK bytes
+MIN_STREAM_CHUNK = 160
+MAX_STREAM_CHUNK = 4096
+RTF_GROW = 0.3
+RTF_SHRINK = 0.7
+RTF_SMOOTHING = 0.1
+
+def _to_stereo(samples: np.ndarray) -> np.ndarray:
+    """Duplicate mono int16 samples into interleaved stereo"""
+    return np.repeat(samples, 2)
+
+def _to_mono(samples: np.ndarray) -> np.ndarray:
+    """Average (frames, 2) int16 stereo samples down to mono"""
+    return (samples.astype(np.int32).sum(axis=1) >> 1).astype(np.int16)
+
+# Taps per polyphase branch of the fixed-ratio resamplers, and the Kaiser
+# window beta of their sinc prototype
+POLYPHASE_TAPS = 24
+POLYPHASE_BETA = 8.0
+
+# Rate pairs served by the fixed-ratio polyphase resampler, as (up, down)
+POLYPHASE_RATIOS = {
+    (16000, 24000): (3, 2),
+    (24000, 16000): (2, 3),
+}
+
+def _polyphase_bank(up: int, down: int) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into `up` branches, taps reversed"""
+    # Odd length padded with one zero tap, so the filter delay is a whole
+    # number of upsampled samples (see _resample_polyphase)
+    length = POLYPHASE_TAPS * up - 1
+    cutoff = 0.5 / max(up, down)
+    n = np.arange(length) - (length - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, POLYPHASE_BETA)
+    h = np.append(h * (up / h.sum()), 0.0)
+    # Branch p holds h[p], h[p + up], ...; reversed to line up with input windows
+    return np.ascontiguousarray(h.reshape(POLYPHASE_TAPS, up).T[:, ::-1], dtype=np.float32)
+
+class _PolyphaseResampler:
+    """Streaming mono int16 resampler for a fixed integer up/down ratio"""
+    
+    def __init__(self, up: int, down: int, position: int = 0):
+        self._up = up
+        self._down = down
+        self._bank = _polyphase_bank(up, down)
+        self._history = np.zeros(POLYPHASE_TAPS - 1, dtype=np.float32)
+        # Upsampled-rate position of the next output, relative to the next chunk
+        self._position = position
+    
+    def resample_chunk(self, samples: np.ndarray) -> np.ndarray:
+        """Resample one chunk, continuing seamlessly from the previous one"""
+        count = samples.size
+        if not count:
+            return np.empty(0, dtype=np.int16)
+        positions = np.arange(self._position, count * self._up, self._down)
+        self._position += positions.size * self._down - count * self._up
+        
+        extended = np.concatenate((self._history, samples.astype(np.float32)))
+        self._history = extended[-(POLYPHASE_TAPS - 1):]
+        windows = np.lib.stride_tricks.sliding_window_view(extended, POLYPHASE_TAPS)
+        out = np.einsum("ij,ij->i", windows[positions // self._up], self._bank[positions % self._up])
+        
+        np.rint(out, out=out)
+        np.clip(out, -32768, 32767, out=out)
+        return out.astype(np.int16)
+
+def _new_dsp_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """One worker so conversions, and the resampler state they share, stay ordered"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dsp")
+
+def _resample_polyphase(samples: np.ndarray, up: int, down: int) -> np.ndarray:
+    """Resample a complete mono signal with a fresh polyphase filter"""
+    # Start one filter delay in so output lines up with the input, and feed
+    # zeros past the end so the filter's tail is flushed
+    delay = POLYPHASE_TAPS * up // 2 - 1
+    resampler = _PolyphaseResampler(up, down, position=delay)
+    padded = np.concatenate((samples, np.zeros(POLYPHASE_TAPS, dtype=np.int16)))
+    return resampler.resample_chunk(padded)[:-(-samples.size * up // down)]
+
+def create_resampler(
+    from_rate: int, to_rate: int, channels: int = 1
+) -> Union[soxr.ResampleStream, _PolyphaseResampler]:
+    """New streaming resampler for one continuous stream; never share it between streams"""
+    ratio = POLYPHASE_RATIOS.get((from_rate, to_rate))
+    if ratio and channels == 1:
+        return _PolyphaseResampler(*ratio)
+    return soxr.ResampleStream(from_rate, to_rate, channels, dtype="int16", quality="HQ")
+
+def _convert_samples(
+    audio_data: bytes,
+    from_rate: int,
+    to_rate: int,
+    from_channels: int,
+    to_channels: int,
+    resampler: Optional[Union[soxr.ResampleStream, _PolyphaseResampler]] = None
+) -> np.ndarray:
+    """Resample and remix int16 PCM; runs on the DSP thread"""
+    samples = np.frombuffer(audio_data, dtype=np.int16)
+    if from_channels > 1:
+        samples = samples.reshape(-1, from_channels)
+    
+    # Convert sample rate if needed; without a stream's own resampler the
+    # chunk is a complete signal and nothing carries over to other calls
+    if resampler is not None:
+        samples = resampler.resample_chunk(samples)
+    elif from_rate != to_rate:
+        ratio = POLYPHASE_RATIOS.get((from_rate, to_rate))
+        if ratio and from_channels == 1:
+            samples = _resample_polyphase(samples, *ratio)
+        else:
+            samples = soxr.resample(samples, from_rate, to_rate, quality="HQ")
+    
+    # Convert channels if needed
+    if from_channels != to_channels:
+        if from_channels == 1 and to_channels == 2:
+            samples = _to_stereo(samples)
+        elif from_channels == 2 and to_channels == 1:
+            samples = _to_mono(samples)
+    
+    return samples
+
 class AudioService:
     """Service for audio processing and streaming"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.is_recording = False
         self.is_playing = False
-        self.audio_buffer = asyncio.Queue()
-        self.output_buffer = asyncio.Queue()
+        # Plain deques: buffering never needs to suspend, so the locking and
+        # waiter futures of asyncio.Queue are pure overhead here
+        self.audio_buffer = collections.deque(maxlen=AUDIO_BUFFER_CHUNKS)
+        self.output_buffer = collections.deque(maxlen=AUDIO_BUFFER_CHUNKS)
+        # CPU-heavy conversions run here so they never block the event loop;
+        # started on the first conversion and again after close()
+        self._dsp_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Hysteretic voice activity: speech starts once the voiced share of
+        # the onset window reaches start_threshold, and ends once the silent
+        # share of the whole history reaches end_threshold
+        self.vad_config = VoiceActivityDetection()
+        self._vad_start_bits = max(1, math.ceil(self.vad_config.start_threshold * VAD_ONSET_BITS))
+        self._vad_end_bits = max(1, math.ceil(self.vad_config.end_threshold * VAD_HISTORY_BITS))
+        self._vad_subframe = SETTINGS.input_sample_rate // VAD_SUBFRAMES_PER_SECOND
+        self._vad_threshold_sq = SETTINGS.vad_threshold ** 2
+        self._vad_bits = 0
+        self.is_speaking = False
+        
+        # Smoothed real-time factor of stream_audio_chunks consumers and the
+        # chunk size it currently selects; both are exposed as metrics
+        self.rtf_ewma = 0.2
+        self.stream_chunk_size = SETTINGS.chunk_size
+        
+        # Static parts of get_audio_info; 16-bit PCM is 500 / rate ms per byte
+        self._ms_per_input_byte = 500.0 / SETTINGS.input_sample_rate
+        self._info_base = {
+            "format": "PCM",
+            "sample_rate": SETTINGS.input_sample_rate,
+            "channels": SETTINGS.channels
+        }
         
     async def convert_audio_format(
         self, 
@@ -26,48 +194,52 @@ class AudioService:
         from_rate: int, 
         to_rate: int,
         from_channels: int = 1,
-        to_channels: int = 1
+        to_channels: int = 1,
+        resampler: Optional[Union[soxr.ResampleStream, _PolyphaseResampler]] = None
     ) -> bytes:
         """Convert audio format and sample rate"""
         try:
-            # Convert sample rate if needed
-            if from_rate != to_rate:
-                audio_data = audioop.ratecv(
-                    audio_data, 2, from_channels, from_rate, to_rate, None
-                )[0]
-            
-            # Convert channels if needed
-            if from_channels != to_channels:
-                if from_channels == 1 and to_channels == 2:
-                    audio_data = audioop.tostereo(audio_data, 2, 1, 1)
-                elif from_channels == 2 and to_channels == 1:
-                    audio_data = audioop.tomono(audio_data, 2, 1, 1)
+            # Nothing to convert
+            if from_rate == to_rate and from_channels == to_channels:
+                return audio_data
             
-            return audio_data
+            if self._dsp_pool is None:
+                self._dsp_pool = _new_dsp_pool()
+            samples = await asyncio.get_running_loop().run_in_executor(
+                self._dsp_pool, _convert_samples, audio_data, from_rate, to_rate,
+                from_channels, to_channels, resampler
+            )
+            return samples.tobytes()
             
         except Exception as e:
-            logger.error(f"Error converting audio format: {e}")
+            logger.error("Error converting audio format: %s", e)
             raise
     
+    def close(self):
+        """Release the DSP thread; a fresh pool is started lazily on next use"""
+        pool, self._dsp_pool = self._dsp_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
     async def process_input_audio(self, audio_data: bytes) -> AudioData:
         """Process incoming audio data"""
         try:
             # Convert to required input format (16kHz PCM)
             processed_data = await self.convert_audio_format(
                 audio_data,
-                from_rate=self.settings.input_sample_rate,
-                to_rate=self.settings.input_sample_rate
+                from_rate=SETTINGS.input_sample_rate,
+                to_rate=SETTINGS.input_sample_rate
             )
             
             return AudioData(
-                data=processed_data,
+                data=bytes(processed_data),
                 format=AudioFormat.PCM,
-                sample_rate=self.settings.input_sample_rate,
-                channels=self.settings.channels
+                sample_rate=SETTINGS.input_sample_rate,
+                channels=SETTINGS.channels
             )
             
         except Exception as e:
-            logger.error(f"Error processing input audio: {e}")
+            logger.error("Error processing input audio: %s", e)
             raise
     
     async def process_output_audio(self, audio_data: bytes) -> AudioData:
@@ -76,71 +248,103 @@ class AudioService:
             # Convert to required output format (24kHz PCM)
             processed_data = await self.convert_audio_format(
                 audio_data,
-                from_rate=self.settings.output_sample_rate,
-                to_rate=self.settings.output_sample_rate
+                from_rate=SETTINGS.output_sample_rate,
+                to_rate=SETTINGS.output_sample_rate
             )
             
             return AudioData(
-                data=processed_data,
+                data=bytes(processed_data),
                 format=AudioFormat.PCM,
-                sample_rate=self.settings.output_sample_rate,
-                channels=self.settings.channels
+                sample_rate=SETTINGS.output_sample_rate,
+                channels=SETTINGS.channels
             )
             
         except Exception as e:
-            logger.error(f"Error processing output audio: {e}")
+            logger.error("Error processing output audio: %s", e)
             raise
     
     async def detect_voice_activity(self, audio_data: bytes) -> bool:
         """Simple voice activity detection"""
         try:
-            # Calculate RMS (Root Mean Square) for volume detection
-            rms = audioop.rms(audio_data, 2)
+            samples = np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+            if not samples.size:
+                return self.is_speaking
             
-            # Simple threshold-based VAD
-            # This is a basic implementation - in production, use more sophisticated VAD
-            threshold = 1000  # Adjust based on your needs
+            # One bit per sub-frame, newest in the lowest bit
+            rows = max(samples.size // self._vad_subframe, 1)
+            packed = int(vad_bits(samples, self._vad_subframe, self._vad_threshold_sq))
+            self._vad_bits = ((self._vad_bits << rows) | packed) & VAD_HISTORY_MASK
             
-            return rms > threshold
+            if not self.is_speaking:
+                if (self._vad_bits & VAD_ONSET_MASK).bit_count() >= self._vad_start_bits:
+                    # Prime the history so release needs fresh silence rather
+                    # than the quiet that preceded the onset
+                    self.is_speaking = True
+                    self._vad_bits = VAD_HISTORY_MASK
+            elif VAD_HISTORY_BITS - self._vad_bits.bit_count() >= self._vad_end_bits:
+                self.is_speaking = False
+            return self.is_speaking
             
         except Exception as e:
-            logger.error(f"Error in voice activity detection: {e}")
+            logger.error("Error in voice activity detection: %s", e)
             return False
     
     async def buffer_audio(self, audio_data: bytes):
         """Buffer audio data for streaming"""
         try:
-            await self.audio_buffer.put(audio_data)
+            # A full buffer drops its oldest chunk
+            self.audio_buffer.append(audio_data)
         except Exception as e:
-            logger.error(f"Error buffering audio: {e}")
+            logger.error("Error buffering audio: %s", e)
             raise
     
     async def get_buffered_audio(self) -> Optional[bytes]:
         """Get buffered audio data"""
         try:
-            if not self.audio_buffer.empty():
-                return await self.audio_buffer.get()
+            # One call instead of a check-then-pop; empty just means no audio
+            return self.audio_buffer.popleft()
+        except IndexError:
             return None
         except Exception as e:
-            logger.error(f"Error getting buffered audio: {e}")
+            logger.error("Error getting buffered audio: %s", e)
             return None
     
     async def stream_audio_chunks(
         self, 
         audio_data: bytes, 
         chunk_size: int = None
-    ) -> AsyncGenerator[bytes, None]:
-        """Stream audio data in chunks"""
+    ) -> AsyncGenerator[memoryview, None]:
+        """Stream audio data in chunks (views into audio_data, not copies)"""
         try:
-            if chunk_size is None:
-                chunk_size = self.settings.chunk_size
+            # Without an explicit size, adapt it to how fast chunks are consumed
+            adaptive = chunk_size is None
+            if adaptive:
+                chunk_size = self.stream_chunk_size
+            bytes_per_second = SETTINGS.input_sample_rate * 2
+            clock = time.perf_counter
             
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i:i + chunk_size]
+            # Slicing a memoryview is free; consumers that keep a chunk
+            # beyond the source buffer's lifetime must copy it with bytes()
+            view = memoryview(audio_data)
+            i = 0
+            while i < len(view):
+                chunk = view[i:i + chunk_size]
+                i += len(chunk)
+                started = clock()
                 yield chunk
                 
+                if adaptive:
+                    # Time the consumer spent on the chunk vs. its duration
+                    rtf = (clock() - started) * bytes_per_second / len(chunk)
+                    self.rtf_ewma += RTF_SMOOTHING * (rtf - self.rtf_ewma)
+                    if self.rtf_ewma < RTF_GROW:
+                        chunk_size = min(chunk_size * 2, MAX_STREAM_CHUNK)
+                    elif self.rtf_ewma > RTF_SHRINK:
+                        chunk_size = max(chunk_size // 2, MIN_STREAM_CHUNK)
+                    self.stream_chunk_size = chunk_size
+                
         except Exception as e:
-            logger.error(f"Error streaming audio chunks: {e}")
+            logger.error("Error streaming audio chunks: %s", e)
             raise
     
     async def apply_audio_effects(self, audio_data: bytes, effects: dict = None) -> bytes:
@@ -154,7 +358,10 @@ class AudioService:
             # Apply volume adjustment
             if 'volume' in effects:
                 volume_factor = effects['volume']
-                processed_data = audioop.mul(processed_data, 2, volume_factor)
+                samples = np.frombuffer(processed_data, dtype=np.int16, count=len(processed_data) // 2)
+                scaled = samples * np.float32(volume_factor)
+                np.clip(scaled, -32768, 32767, out=scaled)
+                processed_data = scaled.astype(np.int16).tobytes()
             
             # Apply other effects as needed
             # This is a basic implementation - extend as needed
@@ -162,7 +369,7 @@ class AudioService:
             return processed_data
             
         except Exception as e:
-            logger.error(f"Error applying audio effects: {e}")
+            logger.error("Error applying audio effects: %s", e)
             return audio_data
     
     async def validate_audio_format(self, audio_data: bytes, expected_format: AudioFormat) -> bool:
@@ -178,19 +385,18 @@ class AudioService:
             return True
             
         except Exception as e:
-            logger.error(f"Error validating audio format: {e}")
+            logger.error("Error validating audio format: %s", e)
             return False
     
     async def get_audio_info(self, audio_data: bytes) -> dict:
         """Get information about audio data"""
         try:
+            size = len(audio_data)
             return {
-                "size": len(audio_data),
-                "duration_ms": len(audio_data) / (self.settings.input_sample_rate * 2) * 1000,
-                "format": "PCM",
-                "sample_rate": self.settings.input_sample_rate,
-                "channels": self.settings.channels
+                "size": size,
+                "duration_ms": size * self._ms_per_input_byte,
+                **self._info_base
             }
         except Exception as e:
-            logger.error(f"Error getting audio info: {e}")
+            logger.error("Error getting audio info: %s", e)
             return {}
@@ -1,15 +1,83 @@
 """
 Gemini Live API service with function calling capabilities
 """
-import asyncio
+import copy
 import json
 import logging
-from typing import AsyncGenerator, Optional, Dict, Any, List
+import time
+from functools import lru_cache
+from typing import AsyncGenerator, Optional, Dict, Any, List, Union
 import google.generativeai as genai
-from config import get_settings
+from config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
+@lru_cache()
+def get_gemini_client():
+    """Configure the Gemini SDK once per process and return it"""
+    api_key = SETTINGS.gemini_api_key
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is required")
+    
+    # Configure the API key
+    genai.configure(api_key=api_key)
+    logger.info("Gemini client initialized successfully")
+    return genai
+
+@lru_cache()
+def get_generative_model():
+    """Build the text model once per process; it holds no per-request state"""
+    return get_gemini_client().GenerativeModel(SETTINGS.gemini_model)
+
+# Function declarations for Gemini Live API, built once per process. The
+# dicts inside are mutable, so callers get a deep copy, never this tuple.
+FUNCTION_DECLARATIONS = (
+    {
+        "name": "open_form",
+        "description": "Opens a new form for data entry. Call this before filling any fields.",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    },
+    {
+        "name": "fill_field",
+        "description": "Fills a specific field in the currently open form with a value.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "field_name": {
+                    "type": "string",
+                    "description": "The name of the field to fill (e.g., 'name', 'email', 'phone')"
+                },
+                "value": {
+                    "type": "string",
+                    "description": "The value to put in the field"
+                }
+            },
+            "required": ["field_name", "value"]
+        }
+    },
+    {
+        "name": "submit_form",
+        "description": "Submits the current form after all fields have been filled.",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    }
+)
+
+# Arguments each tool accepts, with the value used when the model omits one;
+# anything else the model sends is ignored
+TOOL_ARGUMENT_DEFAULTS = {
+    "open_form": {},
+    "fill_field": {"field_name": "", "value": ""},
+    "submit_form": {},
+}
+
 class FormFunctions:
     """Form management functions for Gemini Live API"""
     
@@ -32,7 +100,7 @@ class FormFunctions:
                 "form_id": self.current_form
             }
         except Exception as e:
-            logger.error(f"Error opening form: {e}")
+            logger.error("Error opening form: %s", e)
             return {"success": False, "error": str(e)}
     
     async def fill_field(self, field_name: str, value: str) -> Dict[str, Any]:
@@ -47,7 +115,7 @@ class FormFunctions:
                 return {"success": False, "error": "Field name and value cannot be empty"}
             
             self.form_fields[field_name] = value
-            logger.info(f"Field '{field_name}' filled with value: {value}")
+            logger.info("Field '%s' filled with value: %s", field_name, value)
             
             return {
                 "success": True,
@@ -57,7 +125,7 @@ class FormFunctions:
                 "total_fields": len(self.form_fields)
             }
         except Exception as e:
-            logger.error(f"Error filling field: {e}")
+            logger.error("Error filling field: %s", e)
             return {"success": False, "error": str(e)}
     
     async def submit_form(self) -> Dict[str, Any]:
@@ -69,14 +137,17 @@ class FormFunctions:
             if not self.form_fields:
                 return {"success": False, "error": "Form is empty. Please fill at least one field before submitting."}
             
-            # Process form submission
+            # Process form submission; the fields dict is handed over as-is
+            # since the form state is reset to a fresh dict below
             form_data = {
                 "form_id": self.current_form,
-                "fields": dict(self.form_fields),
-                "submitted_at": asyncio.get_event_loop().time()
+                "fields": self.form_fields,
+                "submitted_at": time.monotonic()
             }
             
-            logger.info(f"Form submitted with {len(self.form_fields)} fields: {self.form_fields}")
+            # Dumping the whole form is the costly part, skip it unless logged
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Form submitted with %s fields: %s", len(self.form_fields), self.form_fields)
             
             # Reset form state
             self.current_form = None
@@ -90,75 +161,39 @@ class FormFunctions:
                 "field_count": len(form_data["fields"])
             }
         except Exception as e:
-            logger.error(f"Error submitting form: {e}")
+            logger.error("Error submitting form: %s", e)
             return {"success": False, "error": str(e)}
 
 class GeminiLiveService:
     """Enhanced Gemini Live API service with function calling"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.client = None
+        self._model = None
         self.session = None
         self.is_connected = False
         self.form_functions = FormFunctions()
+        # Callable tools by function name
+        self._tools = {
+            "open_form": self.form_functions.open_form,
+            "fill_field": self.form_functions.fill_field,
+            "submit_form": self.form_functions.submit_form,
+        }
         self._initialize_client()
     
     def _initialize_client(self):
         """Initialize Gemini client"""
         try:
-            api_key = self.settings.gemini_api_key
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY environment variable is required")
-            
-            # Configure the API key
-            genai.configure(api_key=api_key)
-            self.client = genai
-            logger.info("Gemini client initialized successfully")
+            # Shared by every connection's service
+            self.client = get_gemini_client()
+            self._model = get_generative_model()
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini client: {e}")
+            logger.error("Failed to initialize Gemini client: %s", e)
             raise
     
     def _get_function_declarations(self) -> List[Dict[str, Any]]:
         """Get function declarations for Gemini Live API"""
-        return [
-            {
-                "name": "open_form",
-                "description": "Opens a new form for data entry. Call this before filling any fields.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            },
-            {
-                "name": "fill_field",
-                "description": "Fills a specific field in the currently open form with a value.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "field_name": {
-                            "type": "string",
-                            "description": "The name of the field to fill (e.g., 'name', 'email', 'phone')"
-                        },
-                        "value": {
-                            "type": "string",
-                            "description": "The value to put in the field"
-                        }
-                    },
-                    "required": ["field_name", "value"]
-                }
-            },
-            {
-                "name": "submit_form",
-                "description": "Submits the current form after all fields have been filled.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            }
-        ]
+        return copy.deepcopy(list(FUNCTION_DECLARATIONS))
     
     async def connect(self) -> bool:
         """Connect to Gemini API with function calling"""
@@ -170,7 +205,7 @@ class GeminiLiveService:
             return True
             
         except Exception as e:
-            logger.error(f"Failed to connect to Gemini API: {e}")
+            logger.error("Failed to connect to Gemini API: %s", e)
             self.is_connected = False
             return False
     
@@ -181,9 +216,9 @@ class GeminiLiveService:
             self.is_connected = False
             logger.info("Disconnected from Gemini API")
         except Exception as e:
-            logger.error(f"Error disconnecting from Gemini API: {e}")
+            logger.error("Error disconnecting from Gemini API: %s", e)
     
-    async def send_audio(self, audio_data: bytes, mime_type: str = "audio/pcm;rate=16000"):
+    async def send_audio(self, audio_data: Union[bytes, memoryview], mime_type: str = "audio/pcm;rate=16000"):
         """Send audio data to Gemini API (placeholder for now)"""
         try:
             if not self.is_connected:
@@ -191,12 +226,16 @@ class GeminiLiveService:
             
             # For now, we'll just log that audio was received
             # In a real implementation, you'd convert audio to text and send to Gemini
-            logger.info(f"Received audio data ({len(audio_data)} bytes)")
+            logger.debug("Received audio data (%s bytes)", len(audio_data))
             
         except Exception as e:
-            logger.error(f"Error sending audio to Gemini: {e}")
+            logger.error("Error sending audio to Gemini: %s", e)
             raise
     
+    async def send_audio_batch(self, chunks: List[Union[bytes, memoryview]], mime_type: str = "audio/pcm;rate=16000"):
+        """Send several consecutive audio chunks to Gemini API as one message"""
+        await self.send_audio(b"".join(chunks), mime_type)
+    
     async def send_text(self, text: str, turn_complete: bool = True):
         """Send text message to Gemini API"""
         try:
@@ -204,14 +243,13 @@ class GeminiLiveService:
                 raise Exception("Not connected to Gemini API")
             
             # Use the standard Gemini API to generate a response
-            model = genai.GenerativeModel(self.settings.gemini_model)
-            response = await model.generate_content_async(text)
+            response = await self._model.generate_content_async(text)
             
-            logger.info(f"Sent text to Gemini: {text}")
-            logger.info(f"Received response: {response.text}")
+            logger.info("Sent text to Gemini: %s", text)
+            logger.info("Received response: %s", response.text)
             
         except Exception as e:
-            logger.error(f"Error sending text to Gemini: {e}")
+            logger.error("Error sending text to Gemini: %s", e)
             raise
     
     async def _execute_function_call(self, function_call) -> Dict[str, Any]:
@@ -220,21 +258,17 @@ class GeminiLiveService:
             function_name = function_call.name
             args = function_call.args
             
-            logger.info(f"Executing function: {function_name} with args: {args}")
+            logger.info("Executing function: %s with args: %s", function_name, args)
             
-            if function_name == "open_form":
-                return await self.form_functions.open_form()
-            elif function_name == "fill_field":
-                field_name = args.get("field_name", "")
-                value = args.get("value", "")
-                return await self.form_functions.fill_field(field_name, value)
-            elif function_name == "submit_form":
-                return await self.form_functions.submit_form()
-            else:
+            tool = self._tools.get(function_name)
+            if tool is None:
                 return {"success": False, "error": f"Unknown function: {function_name}"}
+            args = args or {}
+            defaults = TOOL_ARGUMENT_DEFAULTS[function_name]
+            return await tool(**{name: args.get(name, default) for name, default in defaults.items()})
                 
         except Exception as e:
-            logger.error(f"Error executing function call: {e}")
+            logger.error("Error executing function call: %s", e)
             return {"success": False, "error": str(e)}
     
     async def receive_responses(self) -> AsyncGenerator[Dict[str, Any], None]:
@@ -251,7 +285,7 @@ class GeminiLiveService:
             }
                     
         except Exception as e:
-            logger.error(f"Error receiving responses from Gemini: {e}")
+            logger.error("Error receiving responses from Gemini: %s", e)
             raise
     
     async def health_check(self) -> bool:
@@ -259,7 +293,7 @@ class GeminiLiveService:
         try:
             return self.is_connected and self.session is not None
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.error("Health check failed: %s", e)
             return False
             
     def get_form_status(self) -> Dict[str, Any]:
@@ -268,5 +302,6 @@ class GeminiLiveService:
             "is_form_open": self.form_functions.is_form_open,
             "current_form": self.form_functions.current_form,
             "fields_filled": len(self.form_functions.form_fields),
+            # Snapshot: the status may be serialized after the form changes
             "form_fields": dict(self.form_functions.form_fields)
         }
\ No newline at end of file
@@ -2,22 +2,47 @@
 Gemini Live API service for real-time audio streaming
 """
 import asyncio
+import copy
 import json
 import logging
-from typing import AsyncGenerator, Optional, Dict, Any
+from typing import AsyncGenerator, Optional, Dict, Any, List, Union
 from google import genai
 from google.genai import types
 import os
-from config import get_settings
+from functools import lru_cache
+from config import SETTINGS
 from schemas.audio_schemas import AudioData, AudioFormat
 
 logger = logging.getLogger(__name__)
 
+@lru_cache()
+def _live_connect_config_template(voice_name: str) -> Dict[str, Any]:
+    """Live API session config, built once per voice; never handed out directly"""
+    return {
+        "response_modalities": ["AUDIO"],
+        "speech_config": {
+            "voice_config": {
+                "prebuilt_voice_config": {
+                    "voice_name": voice_name
+                }
+            }
+        },
+        "realtime_input_config": {
+            "automatic_activity_detection": {
+                "end_of_speech_sensitivity": 0.5,
+                "start_of_speech_sensitivity": 0.3
+            }
+        }
+    }
+
+def _live_connect_config(voice_name: str) -> Dict[str, Any]:
+    """A private copy of the session config, so one connect cannot change the next"""
+    return copy.deepcopy(_live_connect_config_template(voice_name))
+
 class GeminiLiveService:
     """Service for interacting with Gemini Live API"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.client = None
         self.session = None
         self.is_connected = False
@@ -26,7 +51,7 @@ class GeminiLiveService:
     def _initialize_client(self):
         """Initialize Gemini client"""
         try:
-            api_key = self.settings.gemini_api_key
+            api_key = SETTINGS.gemini_api_key
             if not api_key:
                 raise ValueError("GEMINI_API_KEY environment variable is required")
             
@@ -39,25 +64,10 @@ class GeminiLiveService:
     async def connect(self) -> bool:
         """Connect to Gemini Live API"""
         try:
-            config = {
-                "response_modalities": ["AUDIO"],
-                "speech_config": {
-                    "voice_config": {
-                        "prebuilt_voice_config": {
-                            "voice_name": self.settings.gemini_voice
-                        }
-                    }
-                },
-                "realtime_input_config": {
-                    "automatic_activity_detection": {
-                        "end_of_speech_sensitivity": 0.5,
-                        "start_of_speech_sensitivity": 0.3
-                    }
-                }
-            }
+            config = _live_connect_config(SETTINGS.gemini_voice)
             
             self.session = await self.client.aio.live.connect(
-                model=self.settings.gemini_model,
+                model=SETTINGS.gemini_model,
                 config=config
             )
             
@@ -81,7 +91,7 @@ class GeminiLiveService:
         except Exception as e:
             logger.error(f"Error disconnecting from Gemini Live API: {e}")
     
-    async def send_audio(self, audio_data: bytes, mime_type: str = "audio/pcm;rate=16000"):
+    async def send_audio(self, audio_data: Union[bytes, memoryview], mime_type: str = "audio/pcm;rate=16000"):
         """Send audio data to Gemini Live API"""
         try:
             if not self.is_connected or not self.session:
@@ -95,6 +105,10 @@ class GeminiLiveService:
             logger.error(f"Error sending audio to Gemini: {e}")
             raise
     
+    async def send_audio_batch(self, chunks: List[Union[bytes, memoryview]], mime_type: str = "audio/pcm;rate=16000"):
+        """Send several consecutive audio chunks to Gemini Live API as one realtime input"""
+        await self.send_audio(b"".join(chunks), mime_type)
+    
     async def send_text(self, text: str, turn_complete: bool = True):
         """Send text message to Gemini Live API"""
         try:
@@ -119,30 +133,37 @@ class GeminiLiveService:
             async for response in self.session.receive():
                 try:
                     # Handle server content
-                    if hasattr(response, 'server_content') and response.server_content:
-                        if hasattr(response.server_content, 'model_turn') and response.server_content.model_turn:
-                            for part in response.server_content.model_turn.parts:
-                                if hasattr(part, 'inline_data') and part.inline_data:
-                                    # Audio response
-                                    yield {
-                                        "type": "audio",
-                                        "data": part.inline_data.data,
-                                        "mime_type": part.inline_data.mime_type if hasattr(part.inline_data, 'mime_type') else "audio/pcm"
-                                    }
-                                elif hasattr(part, 'text') and part.text:
-                                    # Text response
-                                    yield {
-                                        "type": "text",
-                                        "data": part.text
-                                    }
+                    server_content = getattr(response, 'server_content', None)
+                    if not server_content:
+                        continue
+                    
+                    model_turn = getattr(server_content, 'model_turn', None)
+                    if model_turn:
+                        # Parts go out in order; runs of adjacent token-sized
+                        # text parts coalesce into one event
+                        texts = []
+                        for part in model_turn.parts:
+                            inline_data = getattr(part, 'inline_data', None)
+                            if inline_data:
+                                if texts:
+                                    yield {"type": "text", "data": "".join(texts)}
+                                    texts = []
+                                yield {
+                                    "type": "audio",
+                                    "data": inline_data.data,
+                                    "mime_type": getattr(inline_data, 'mime_type', None) or "audio/pcm"
+                                }
+                            elif text := getattr(part, 'text', None):
+                                texts.append(text)
+                        if texts:
+                            yield {"type": "text", "data": "".join(texts)}
                     
                     # Handle turn complete
-                    if hasattr(response, 'server_content') and response.server_content:
-                        if hasattr(response.server_content, 'turn_complete') and response.server_content.turn_complete:
-                            yield {
-                                "type": "turn_complete",
-                                "data": True
-                            }
+                    if getattr(server_content, 'turn_complete', None):
+                        yield {
+                            "type": "turn_complete",
+                            "data": True
+                        }
                             
                 except Exception as e:
                     logger.error(f"Error processing Gemini response: {e}")
@@ -4,54 +4,103 @@ RTVI protocol service implementation
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, Callable, List
-from datetime import datetime
+import time
+from typing import Dict, Any, Optional, Callable, Tuple, Union
 from schemas.rtvi_schemas import (
     RTVIMessage, RTVIEventType, RTVITransportState, 
     RTVITransportStateMessage, RTVITranscriptionMessage,
     RTVISpeakingMessage, RTVIErrorMessage, RTVIAudioMessage,
     RTVIClientConfig, RTVIServiceConfig
 )
-from config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Most queued events dispatched per wake-up of the flush task
+RTVI_EVENT_BATCH = 32
+
 class RTVIService:
     """RTVI protocol service for standardized communication"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.transport_state = RTVITransportState.DISCONNECTED
-        self.event_handlers: Dict[RTVIEventType, List[Callable]] = {}
+        # Handlers per event as tuples, rebuilt on (un)register so dispatch
+        # is a single dict lookup
+        self.event_handlers: Dict[RTVIEventType, Tuple[Callable, ...]] = {}
         self.client_config: Optional[RTVIClientConfig] = None
         self.session_id: Optional[str] = None
         self.is_user_speaking = False
         self.is_bot_speaking = False
+        # Events are queued and dispatched in order by one flush task, so
+        # emitters don't await the handler chain per frame
+        self._event_queue: asyncio.Queue = asyncio.Queue()
+        self._flush_task: Optional[asyncio.Task] = None
         
     def register_event_handler(self, event_type: RTVIEventType, handler: Callable):
         """Register an event handler"""
-        if event_type not in self.event_handlers:
-            self.event_handlers[event_type] = []
-        self.event_handlers[event_type].append(handler)
+        self.event_handlers[event_type] = (*self.event_handlers.get(event_type, ()), handler)
         logger.debug(f"Registered handler for event: {event_type}")
     
+    def register_event_handlers(self, handlers: Dict[RTVIEventType, Callable]):
+        """Register one handler for each of several events in a single call"""
+        for event_type, handler in handlers.items():
+            self.event_handlers[event_type] = (*self.event_handlers.get(event_type, ()), handler)
+        logger.debug(f"Registered handlers for events: {list(handlers)}")
+    
     def unregister_event_handler(self, event_type: RTVIEventType, handler: Callable):
         """Unregister an event handler"""
         if event_type in self.event_handlers:
-            self.event_handlers[event_type].remove(handler)
+            handlers = list(self.event_handlers[event_type])
+            handlers.remove(handler)
+            self.event_handlers[event_type] = tuple(handlers)
             logger.debug(f"Unregistered handler for event: {event_type}")
     
     async def emit_event(self, event_type: RTVIEventType, data: Dict[str, Any] = None):
         """Emit an RTVI event"""
-        try:
-            if event_type in self.event_handlers:
-                for handler in self.event_handlers[event_type]:
-                    try:
-                        await handler(data)
-                    except Exception as e:
-                        logger.error(f"Error in event handler for {event_type}: {e}")
-        except Exception as e:
-            logger.error(f"Error emitting event {event_type}: {e}")
+        # Errors skip the queue; without a flush task everything runs inline
+        if self._flush_task is None or event_type == RTVIEventType.ERROR:
+            await self._dispatch_event(event_type, data)
+        else:
+            self._event_queue.put_nowait((event_type, data))
+    
+    async def _dispatch_event(self, event_type: RTVIEventType, data: Dict[str, Any] = None):
+        """Run the handlers registered for an event"""
+        handlers = self.event_handlers.get(event_type)
+        if not handlers:
+            return
+        
+        # A lone handler is awaited directly; gather would wrap it in a task
+        if len(handlers) == 1:
+            try:
+                await handlers[0](data)
+            except Exception as e:
+                logger.error("Error in event handler for %s: %s", event_type, e)
+            return
+        
+        results = await asyncio.gather(*(handler(data) for handler in handlers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Error in event handler for %s: %s", event_type, result)
+    
+    async def _flush_events(self):
+        """Dispatch queued events in order until the None sentinel arrives"""
+        queue = self._event_queue
+        while True:
+            # Wait for one event, then take whatever else is already queued
+            batch = [await queue.get()]
+            while len(batch) < RTVI_EVENT_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            for event in batch:
+                if event is None:
+                    return
+                await self._dispatch_event(*event)
+    
+    async def close(self):
+        """Stop the flush task after it has dispatched every queued event"""
+        task, self._flush_task = self._flush_task, None
+        if task:
+            self._event_queue.put_nowait(None)
+            await task
     
     async def set_transport_state(self, state: RTVITransportState):
         """Set transport state and emit event"""
@@ -77,6 +126,9 @@ class RTVIService:
             # Parse and validate client configuration
             self.client_config = RTVIClientConfig(**config)
             
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_events())
+            
             # Set initial transport state
             await self.set_transport_state(RTVITransportState.CONNECTING)
             
@@ -97,28 +149,33 @@ class RTVIService:
         except Exception as e:
             logger.error(f"Error handling client ready: {e}")
     
-    async def handle_audio_input(self, audio_data: bytes, format: str = "pcm", sample_rate: int = 16000):
+    async def handle_audio_input(self, audio_data: Union[bytes, memoryview], format: str = "pcm", sample_rate: int = 16000):
         """Handle incoming audio data"""
         try:
+            # One view shared by the message and every handler; consumers
+            # that need bytes convert it themselves
+            audio_data = memoryview(audio_data)
+            
             # Create audio message
-            audio_message = RTVIAudioMessage(
+            audio_message = RTVIAudioMessage.model_construct(
                 type=RTVIEventType.AUDIO_INPUT,
                 audio_data=audio_data,
                 format=format,
                 sample_rate=sample_rate,
-                timestamp=datetime.now().timestamp()
+                timestamp=time.time()
             )
             
-            # Emit audio input event
-            await self.emit_event(
-                RTVIEventType.AUDIO_INPUT,
-                {
-                    "audio_data": audio_data,
-                    "format": format,
-                    "sample_rate": sample_rate,
-                    "size": len(audio_data)
-                }
-            )
+            # Emit audio input event; skip building it when nothing subscribes
+            if self.event_handlers.get(RTVIEventType.AUDIO_INPUT):
+                await self.emit_event(
+                    RTVIEventType.AUDIO_INPUT,
+                    {
+                        "audio_data": audio_data,
+                        "format": format,
+                        "sample_rate": sample_rate,
+                        "size": len(audio_data)
+                    }
+                )
             
             return audio_message
             
@@ -126,28 +183,33 @@ class RTVIService:
             logger.error(f"Error handling audio input: {e}")
             raise
     
-    async def handle_audio_output(self, audio_data: bytes, format: str = "pcm", sample_rate: int = 24000):
+    async def handle_audio_output(self, audio_data: Union[bytes, memoryview], format: str = "pcm", sample_rate: int = 24000):
         """Handle outgoing audio data"""
         try:
+            # One view shared by the message and every handler; consumers
+            # that need bytes convert it themselves
+            audio_data = memoryview(audio_data)
+            
             # Create audio message
-            audio_message = RTVIAudioMessage(
+            audio_message = RTVIAudioMessage.model_construct(
                 type=RTVIEventType.AUDIO_OUTPUT,
                 audio_data=audio_data,
                 format=format,
                 sample_rate=sample_rate,
-                timestamp=datetime.now().timestamp()
+                timestamp=time.time()
             )
             
-            # Emit audio output event
-            await self.emit_event(
-                RTVIEventType.AUDIO_OUTPUT,
-                {
-                    "audio_data": audio_data,
-                    "format": format,
-                    "sample_rate": sample_rate,
-                    "size": len(audio_data)
-                }
-            )
+            # Emit audio output event; skip building it when nothing subscribes
+            if self.event_handlers.get(RTVIEventType.AUDIO_OUTPUT):
+                await self.emit_event(
+                    RTVIEventType.AUDIO_OUTPUT,
+                    {
+                        "audio_data": audio_data,
+                        "format": format,
+                        "sample_rate": sample_rate,
+                        "size": len(audio_data)
+                    }
+                )
             
             return audio_message
             
@@ -158,12 +220,12 @@ class RTVIService:
     async def handle_user_transcription(self, text: str, is_final: bool = False, confidence: float = None):
         """Handle user transcription"""
         try:
-            transcription_message = RTVITranscriptionMessage(
+            transcription_message = RTVITranscriptionMessage.model_construct(
                 type=RTVIEventType.USER_TRANSCRIPTION,
                 text=text,
                 is_final=is_final,
                 confidence=confidence,
-                timestamp=datetime.now().timestamp()
+                timestamp=time.time()
             )
             
             await self.emit_event(
@@ -184,12 +246,12 @@ class RTVIService:
     async def handle_bot_transcription(self, text: str, is_final: bool = False, confidence: float = None):
         """Handle bot transcription"""
         try:
-            transcription_message = RTVITranscriptionMessage(
+            transcription_message = RTVITranscriptionMessage.model_construct(
                 type=RTVIEventType.BOT_TRANSCRIPTION,
                 text=text,
                 is_final=is_final,
                 confidence=confidence,
-                timestamp=datetime.now().timestamp()
+                timestamp=time.time()
             )
             
             await self.emit_event(
@@ -213,11 +275,11 @@ class RTVIService:
             if self.is_user_speaking != is_speaking:
                 self.is_user_speaking = is_speaking
                 
-                speaking_message = RTVISpeakingMessage(
+                speaking_message = RTVISpeakingMessage.model_construct(
                     type=RTVIEventType.USER_SPEAKING,
                     is_speaking=is_speaking,
                     speaker="user",
-                    timestamp=datetime.now().timestamp()
+                    timestamp=time.time()
                 )
                 
                 await self.emit_event(
@@ -240,11 +302,11 @@ class RTVIService:
             if self.is_bot_speaking != is_speaking:
                 self.is_bot_speaking = is_speaking
                 
-                speaking_message = RTVISpeakingMessage(
+                speaking_message = RTVISpeakingMessage.model_construct(
                     type=RTVIEventType.BOT_SPEAKING,
                     is_speaking=is_speaking,
                     speaker="bot",
-                    timestamp=datetime.now().timestamp()
+                    timestamp=time.time()
                 )
                 
                 await self.emit_event(
@@ -264,10 +326,10 @@ class RTVIService:
     async def handle_error(self, error: str, code: int = None):
         """Handle error events"""
         try:
-            error_message = RTVIErrorMessage(
+            error_message = RTVIErrorMessage.model_construct(
                 error=error,
                 code=code,
-                timestamp=datetime.now().timestamp()
+                timestamp=time.time()
             )
             
             await self.emit_event(
@@ -290,7 +352,7 @@ class RTVIService:
         try:
             return RTVIMessage(
                 type=event_type,
-                timestamp=datetime.now().timestamp(),
+                timestamp=time.time(),
                 data=data or {}
             )
         except Exception as e:
@@ -301,6 +363,7 @@ class RTVIService:
         """Disconnect and cleanup"""
         try:
             await self.set_transport_state(RTVITransportState.DISCONNECTED)
+            await self.close()
             self.event_handlers.clear()
             self.client_config = None
             self.session_id = None
@@ -7,7 +7,7 @@ import os
 from typing import AsyncGenerator, Dict, Any, Optional
 from google import genai
 from google.genai import types
-from config import get_settings
+from config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,6 @@ class SimplifiedGeminiService:
     """Simplified Gemini Live API service for real-time audio streaming"""
     
     def __init__(self):
-        self.settings = get_settings()
         self.client = None
         self.session = None
         self.is_connected = False
@@ -33,7 +32,7 @@ class SimplifiedGeminiService:
     def _initialize_client(self):
         """Initialize Gemini client"""
         try:
-            api_key = self.settings.gemini_api_key
+            api_key = SETTINGS.gemini_api_key
             if not api_key:
                 logger.error("GEMINI_API_KEY not found in environment")
                 return
@@ -56,7 +55,7 @@ class SimplifiedGeminiService:
                 "speech_config": {
                     "voice_config": {
                         "prebuilt_voice_config": {
-                            "voice_name": self.settings.gemini_voice
+                            "voice_name": SETTINGS.gemini_voice
                         }
                     }
                 }
@@ -0,0 +1,7 @@
+"""
+Shared test setup
+"""
+import os
+
+# Services refuse to start without a key; tests never reach the API
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
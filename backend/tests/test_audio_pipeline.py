@@ -0,0 +1,108 @@
+"""
+Tests for the audio pipeline's input ring buffer
+"""
+import asyncio
+import numpy as np
+from pipelines import audio_pipeline
+from pipelines.audio_pipeline import LowLatencyAudioPipeline, AUDIO_RING_SLOTS, AUDIO_SEND_BATCH
+
+def _loud_chunk(value: int) -> bytes:
+    """A chunk well above the VAD threshold whose samples all equal value"""
+    return np.full(512, value, dtype=np.int16).tobytes()
+
+def test_ring_overflow_keeps_in_flight_slots():
+    """Filling the ring while two batches are being sent must not touch their slots"""
+    async def run():
+        pipeline = LowLatencyAudioPipeline()
+        pipeline.is_running = True
+        
+        # The consumer has claimed slots 0..15 and both sends are in flight
+        for i in range(2 * AUDIO_SEND_BATCH):
+            await pipeline.process_audio_input(_loud_chunk(1000 + i))
+        in_flight = [memoryview(pipeline._slots[i])[:pipeline._lens[i]] for i in range(2 * AUDIO_SEND_BATCH)]
+        expected = [bytes(view) for view in in_flight]
+        pipeline._tail = 2 * AUDIO_SEND_BATCH
+        
+        # Keep producing well past the ring's capacity
+        for i in range(3 * AUDIO_RING_SLOTS):
+            await pipeline.process_audio_input(_loud_chunk(5000 + i))
+        
+        assert [bytes(view) for view in in_flight] == expected
+        assert pipeline._head - pipeline._claimed <= AUDIO_RING_SLOTS
+        assert pipeline._head - pipeline._tail <= AUDIO_RING_SLOTS - 2 * AUDIO_SEND_BATCH
+    
+    asyncio.run(run())
+
+def test_ring_sends_every_chunk_in_order(monkeypatch):
+    """With a prompt consumer every chunk reaches Gemini once, in order"""
+    monkeypatch.setattr(audio_pipeline.SETTINGS, "skip_silent_audio", False)
+    
+    async def run():
+        pipeline = LowLatencyAudioPipeline()
+        sent = []
+        
+        async def send_audio_batch(chunks, mime_type=None):
+            sent.extend(bytes(chunk) for chunk in chunks)
+        
+        pipeline.gemini_service.send_audio_batch = send_audio_batch
+        pipeline.is_running = True
+        consumer = asyncio.create_task(pipeline._process_audio_input())
+        
+        chunks = [_loud_chunk(i) for i in range(40)]
+        for chunk in chunks:
+            await pipeline.process_audio_input(chunk)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.2)
+        
+        pipeline.is_running = False
+        pipeline._data_event.set()
+        await consumer
+        assert sent == chunks
+    
+    asyncio.run(run())
+
+def test_stop_without_start_releases_background_tasks():
+    """A pipeline that was initialized but never started leaves no tasks behind"""
+    class FakeWebSocket:
+        pass
+    
+    async def run():
+        pipeline = LowLatencyAudioPipeline()
+        await pipeline.initialize(FakeWebSocket())
+        await pipeline.stop()
+        
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        assert not pending
+    
+    asyncio.run(run())
+
+def test_small_frames_are_flushed_before_the_ring_drops_them(monkeypatch):
+    """Frames too small to reach the coalesce target still go out without drops"""
+    monkeypatch.setattr(audio_pipeline.SETTINGS, "skip_silent_audio", False)
+    
+    async def run():
+        pipeline = LowLatencyAudioPipeline()
+        sent = []
+        
+        async def send_audio_batch(chunks, mime_type=None):
+            sent.extend(bytes(chunk) for chunk in chunks)
+        
+        pipeline.gemini_service.send_audio_batch = send_audio_batch
+        pipeline.is_running = True
+        consumer = asyncio.create_task(pipeline._process_audio_input())
+        
+        # 5 ms frames arriving faster than real time
+        chunks = [np.full(80, i, dtype=np.int16).tobytes() for i in range(100)]
+        for chunk in chunks:
+            await pipeline.process_audio_input(chunk)
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.2)
+        
+        pipeline.is_running = False
+        pipeline._data_event.set()
+        await consumer
+        assert pipeline.audio_chunks_dropped == 0
+        assert sent == chunks
+        assert pipeline._pending_len == 0
+    
+    asyncio.run(run())
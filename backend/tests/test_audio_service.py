@@ -0,0 +1,176 @@
+"""
+Tests for the audio service
+"""
+import asyncio
+import numpy as np
+import pytest
+from services import audio_service
+from services.audio_service import AudioService, create_resampler, MIN_STREAM_CHUNK, MAX_STREAM_CHUNK
+from config import SETTINGS
+
+def _stream_sizes(service: AudioService, monkeypatch, rtf: float, count: int):
+    """Sizes of the first count chunks streamed to a consumer running at rtf"""
+    now = [0.0]
+    monkeypatch.setattr(audio_service.time, "perf_counter", lambda: now[0])
+    bytes_per_second = SETTINGS.input_sample_rate * 2
+    
+    async def run():
+        sizes = []
+        async for chunk in service.stream_audio_chunks(bytes(1 << 20)):
+            sizes.append(len(chunk))
+            # The consumer spends rtf times the chunk's playback duration on it
+            now[0] += rtf * len(chunk) / bytes_per_second
+            if len(sizes) == count:
+                break
+        return sizes
+    
+    return asyncio.run(run())
+
+def test_stream_chunks_grow_for_fast_consumers(monkeypatch):
+    """A consumer with plenty of headroom gets larger chunks, up to the cap"""
+    service = AudioService()
+    sizes = _stream_sizes(service, monkeypatch, rtf=0.05, count=20)
+    assert sizes[0] == SETTINGS.chunk_size
+    assert sizes[1] > sizes[0]
+    assert max(sizes) == MAX_STREAM_CHUNK
+    assert service.stream_chunk_size == MAX_STREAM_CHUNK
+
+def test_stream_chunks_shrink_for_slow_consumers(monkeypatch):
+    """A consumer close to real time gets smaller chunks, down to the floor"""
+    service = AudioService()
+    service.stream_chunk_size = MAX_STREAM_CHUNK
+    sizes = _stream_sizes(service, monkeypatch, rtf=2.0, count=40)
+    assert sizes[0] == MAX_STREAM_CHUNK
+    assert sizes[-1] == MIN_STREAM_CHUNK
+    assert service.rtf_ewma > 0.7
+
+def test_explicit_chunk_size_is_not_adapted():
+    """Passing chunk_size streams fixed-size views of the input"""
+    service = AudioService()
+    
+    async def run():
+        return [bytes(chunk) async for chunk in service.stream_audio_chunks(bytes(range(10)), chunk_size=4)]
+    
+    assert asyncio.run(run()) == [bytes(range(4)), bytes(range(4, 8)), bytes(range(8, 10))]
+    assert service.stream_chunk_size == SETTINGS.chunk_size
+
+def test_voice_activity_starts_at_once_and_holds_through_pauses():
+    """Onset needs one voiced chunk; release needs sustained silence"""
+    loud = np.full(SETTINGS.chunk_size, 3000, dtype=np.int16).tobytes()
+    quiet = bytes(SETTINGS.chunk_size * 2)
+    service = AudioService()
+    
+    async def run():
+        return [await service.detect_voice_activity(chunk) for chunk in [quiet] * 3 + [loud] + [quiet] * 3 + [quiet] * 10]
+    
+    decisions = asyncio.run(run())
+    assert decisions[:3] == [False] * 3
+    # Speech is detected on the first loud chunk and survives a short pause
+    assert decisions[3:7] == [True] * 4
+    # About end_threshold of the history must be silent before it ends
+    assert decisions[-1] is False
+
+def _tone(rate: int, count: int) -> bytes:
+    """A 440 Hz int16 sine of count samples"""
+    return (8000 * np.sin(2 * np.pi * 440 * np.arange(count) / rate)).astype(np.int16).tobytes()
+
+def test_one_shot_resampling_is_complete_and_independent():
+    """Each call converts a whole signal; nothing leaks into the next call"""
+    service = AudioService()
+    
+    async def run():
+        first = bytes(await service.convert_audio_format(_tone(16000, 1600), 16000, 44100))
+        other = bytes(await service.convert_audio_format(bytes(3200), 16000, 44100))
+        again = bytes(await service.convert_audio_format(_tone(16000, 1600), 16000, 44100))
+        return first, other, again
+    
+    first, other, again = asyncio.run(run())
+    assert len(first) == 4410 * 2
+    assert first == again
+    # Silence stays silent apart from soxr's dither; a leaked tone tail would not
+    assert np.abs(np.frombuffer(other, dtype=np.int16)).max() <= 1
+
+def test_polyphase_streams_keep_separate_state():
+    """Each stream's resampler continues only its own signal"""
+    service = AudioService()
+    tone = _tone(16000, 3200)
+    
+    async def run():
+        whole = bytes(await service.convert_audio_format(tone, 16000, 24000, resampler=create_resampler(16000, 24000)))
+        
+        # Interleave a second stream on the same rate pair between the chunks
+        first, second = create_resampler(16000, 24000), create_resampler(16000, 24000)
+        chunks = []
+        for i in range(0, len(tone), 640):
+            chunks.append(bytes(await service.convert_audio_format(tone[i:i + 640], 16000, 24000, resampler=first)))
+            await service.convert_audio_format(bytes(640), 16000, 24000, resampler=second)
+        return whole, b"".join(chunks)
+    
+    whole, chunked = asyncio.run(run())
+    assert chunked == whole
+
+def test_polyphase_one_shot_is_aligned_with_the_input():
+    """One-shot 16 kHz -> 24 kHz output has the exact length and no delay"""
+    service = AudioService()
+    
+    async def run():
+        return np.frombuffer(bytes(await service.convert_audio_format(_tone(16000, 16000), 16000, 24000)), dtype=np.int16)
+    
+    converted = asyncio.run(run())
+    expected = np.frombuffer(_tone(24000, 24000), dtype=np.int16)
+    assert converted.size == expected.size
+    assert np.abs(converted[100:-100].astype(np.int32) - expected[100:-100]).max() <= 4
+
+def test_converted_audio_survives_later_conversions():
+    """Results are independent bytes, including resampled stereo"""
+    service = AudioService()
+    mono = np.frombuffer(_tone(16000, 1600), dtype=np.int16)
+    stereo = np.repeat(mono, 2).tobytes()
+    
+    async def run():
+        first = await service.convert_audio_format(stereo, 16000, 44100, 2, 2)
+        kept = bytes(first)
+        await service.convert_audio_format(bytes(len(stereo)), 16000, 44100, 2, 2)
+        await service.apply_audio_effects(_tone(16000, 1600), {"volume": 0.5})
+        return first, kept
+    
+    first, kept = asyncio.run(run())
+    assert isinstance(first, bytes)
+    assert first == kept
+    channels = np.frombuffer(first, dtype=np.int16).reshape(-1, 2)
+    assert channels.shape[0] == 4410
+    # Both channels carry the same tone, up to soxr's per-channel dither
+    assert np.abs(channels[:, 0].astype(np.int32) - channels[:, 1]).max() <= 2
+
+def test_numba_vad_kernel_is_compiled_at_import():
+    """Chunks from bytes or bytearray reuse the warmed-up kernels and match numpy"""
+    pytest.importorskip("numba")
+    from services import _vad_kernels
+    
+    kernel = _vad_kernels.vad_bits
+    signatures = list(kernel.signatures)
+    audio = _tone(16000, 800)
+    for buffer in (audio, bytearray(audio)):
+        samples = np.frombuffer(buffer, dtype=np.int16)
+        expected = _vad_kernels._vad_bits_numpy(samples, 160, 100 ** 2)
+        assert kernel(samples, 160, 100 ** 2) & ((1 << 64) - 1) == expected
+    assert list(kernel.signatures) == signatures
+
+def test_dsp_pool_is_started_on_demand():
+    """close() releases the pool and the next conversion starts a new one"""
+    service = AudioService()
+    assert service._dsp_pool is None
+    
+    audio = _tone(16000, 320)
+    asyncio.run(service.convert_audio_format(audio, 16000, 24000))
+    first = service._dsp_pool
+    assert first is not None
+    
+    service.close()
+    assert service._dsp_pool is None
+    service.close()
+    
+    converted = asyncio.run(service.convert_audio_format(audio, 16000, 24000))
+    assert len(converted) == 2 * 480
+    assert service._dsp_pool is not None and service._dsp_pool is not first
+    service.close()
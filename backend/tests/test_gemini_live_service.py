@@ -0,0 +1,52 @@
+"""
+Tests for Gemini function call dispatch
+"""
+import asyncio
+from types import SimpleNamespace
+from services.gemini_live_service import GeminiLiveService
+
+def _call(service: GeminiLiveService, name: str, args=None):
+    """Run one function call the way the Live API would deliver it"""
+    return asyncio.run(service._execute_function_call(SimpleNamespace(name=name, args=args)))
+
+def test_missing_arguments_fall_back_to_defaults():
+    """A fill_field call without a value reaches the tool and its own validation"""
+    service = GeminiLiveService()
+    assert _call(service, "open_form")["success"]
+    result = _call(service, "fill_field", {"field_name": "name"})
+    assert result == {"success": False, "error": "Field name and value cannot be empty"}
+    assert _call(service, "fill_field", None)["error"] == "Field name and value cannot be empty"
+
+def test_extra_arguments_are_ignored():
+    """Arguments a tool does not take do not turn the call into an error"""
+    service = GeminiLiveService()
+    assert _call(service, "open_form", {"form_type": "contact"})["success"]
+    assert _call(service, "fill_field", {"field_name": "email", "value": "a@b.co", "confidence": 0.9})["success"]
+    assert _call(service, "submit_form", {"confirm": True})["success"]
+
+def test_unknown_function_is_reported():
+    """Names outside the tool table return an error result"""
+    result = _call(GeminiLiveService(), "delete_everything")
+    assert result == {"success": False, "error": "Unknown function: delete_everything"}
+
+def test_form_status_is_a_snapshot():
+    """Later fills and caller edits do not leak into a status already taken"""
+    service = GeminiLiveService()
+    _call(service, "open_form")
+    _call(service, "fill_field", {"field_name": "name", "value": "Ada"})
+    status = service.get_form_status()
+    
+    _call(service, "fill_field", {"field_name": "email", "value": "ada@example.com"})
+    status["form_fields"]["name"] = "Eve"
+    assert status["form_fields"] == {"name": "Eve"}
+    assert service.get_form_status()["form_fields"]["name"] == "Ada"
+
+def test_function_declarations_are_not_shared():
+    """Editing one service's declarations leaves the next service's untouched"""
+    declarations = GeminiLiveService()._get_function_declarations()
+    declarations[1]["parameters"]["required"].append("confidence")
+    declarations.pop()
+    
+    fresh = GeminiLiveService()._get_function_declarations()
+    assert [declaration["name"] for declaration in fresh] == ["open_form", "fill_field", "submit_form"]
+    assert fresh[1]["parameters"]["required"] == ["field_name", "value"]
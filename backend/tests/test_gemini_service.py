@@ -0,0 +1,51 @@
+"""
+Tests for Gemini Live response parsing
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("google.genai")
+from services.gemini_service import GeminiLiveService, _live_connect_config
+
+def _text(text):
+    return SimpleNamespace(inline_data=None, text=text)
+
+def _audio(data):
+    return SimpleNamespace(inline_data=SimpleNamespace(data=data, mime_type="audio/pcm"), text=None)
+
+def test_response_parts_keep_their_order():
+    """Audio and text interleave as sent; only adjacent text parts merge"""
+    parts = [_text("Hel"), _text("lo"), _audio(b"\x01"), _text("there"), _audio(b"\x02")]
+    
+    class FakeSession:
+        async def receive(self):
+            yield SimpleNamespace(server_content=SimpleNamespace(
+                model_turn=SimpleNamespace(parts=parts), turn_complete=True
+            ))
+    
+    service = GeminiLiveService()
+    service.session = FakeSession()
+    service.is_connected = True
+    
+    async def collect():
+        return [event async for event in service.receive_responses()]
+    
+    events = [(event["type"], event["data"]) for event in asyncio.run(collect())]
+    assert events == [
+        ("text", "Hello"),
+        ("audio", b"\x01"),
+        ("text", "there"),
+        ("audio", b"\x02"),
+        ("turn_complete", True),
+    ]
+
+def test_live_connect_config_is_not_shared():
+    """Changing one session's config leaves later connects untouched"""
+    config = _live_connect_config("Puck")
+    config["response_modalities"].append("TEXT")
+    config["speech_config"]["voice_config"]["prebuilt_voice_config"]["voice_name"] = "Other"
+    
+    fresh = _live_connect_config("Puck")
+    assert fresh["response_modalities"] == ["AUDIO"]
+    assert fresh["speech_config"]["voice_config"]["prebuilt_voice_config"]["voice_name"] == "Puck"
@@ -0,0 +1,36 @@
+"""
+Tests for RTVI audio event handling
+"""
+import asyncio
+from schemas.rtvi_schemas import RTVIAudioMessage, RTVIEventType
+from services.rtvi_service import RTVIService
+
+def test_audio_messages_are_returned_without_subscribers():
+    """handle_audio_input/output build their message even when no handler is registered"""
+    async def run():
+        service = RTVIService()
+        inbound = await service.handle_audio_input(b"\x01\x02")
+        outbound = await service.handle_audio_output(b"\x03\x04")
+        return inbound, outbound
+    
+    inbound, outbound = asyncio.run(run())
+    assert isinstance(inbound, RTVIAudioMessage) and inbound.type == RTVIEventType.AUDIO_INPUT
+    assert bytes(inbound.audio_data) == b"\x01\x02" and inbound.sample_rate == 16000
+    assert isinstance(outbound, RTVIAudioMessage) and outbound.type == RTVIEventType.AUDIO_OUTPUT
+    assert bytes(outbound.audio_data) == b"\x03\x04" and outbound.sample_rate == 24000
+
+def test_audio_events_reach_registered_handlers():
+    """Subscribed handlers still receive the audio event"""
+    received = []
+    
+    async def handler(data):
+        received.append(bytes(data["audio_data"]))
+    
+    async def run():
+        service = RTVIService()
+        service.register_event_handler(RTVIEventType.AUDIO_INPUT, handler)
+        return await service.handle_audio_input(b"\x05\x06")
+    
+    message = asyncio.run(run())
+    assert received == [b"\x05\x06"]
+    assert bytes(message.audio_data) == b"\x05\x06"
@@ -0,0 +1,97 @@
+"""
+Tests for the WebSocket message flow
+"""
+import asyncio
+import orjson
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from fastapi.websockets import WebSocketState
+from config import SETTINGS
+from main import app
+from routes.websocket import Connection, ConnectionManager, manager, websocket_endpoint
+
+def _receive_until(websocket, message_type: str):
+    """Receive JSON messages, unpacking batch frames, up to the first of message_type"""
+    messages = []
+    while not messages or messages[-1].get("type") != message_type:
+        data = websocket.receive_json()
+        for message in data["items"] if data.get("type") == "batch" else [data]:
+            if not messages or messages[-1].get("type") != message_type:
+                messages.append(message)
+    return messages
+
+def test_recognized_command_is_answered_then_acknowledged():
+    """A local voice command gets its response followed by text_received"""
+    with TestClient(app).websocket_connect("/ws?batch=1") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        websocket.send_json({"type": "text_input", "text": "open voice form"})
+        
+        messages = [
+            message for message in _receive_until(websocket, "text_received")
+            if message["type"] in ("voice_command_response", "text_received")
+        ]
+        assert [message["type"] for message in messages] == ["voice_command_response", "text_received"]
+        assert messages[0]["response"]["action"] == "switch_tab"
+        assert messages[1]["text"] == "open voice form"
+
+def test_clients_without_batch_opt_in_get_one_frame_per_message():
+    """Only ?batch=1 clients receive batch envelopes"""
+    with TestClient(app).websocket_connect("/ws") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "text_input", "text": "open voice form"})
+        
+        types = []
+        while "text_received" not in types:
+            types.append(websocket.receive_json()["type"])
+        assert "batch" not in types
+        assert types[-2:] == ["voice_command_response", "text_received"]
+
+def test_broadcast_goes_through_each_pipeline_writer():
+    """Broadcast enqueues one shared pre-encoded frame instead of writing to sockets"""
+    class FakeWebSocket:
+        client_state = WebSocketState.CONNECTED
+        
+        async def send_text(self, text):
+            raise AssertionError("broadcast wrote to the socket directly")
+    
+    class FakePipeline:
+        def __init__(self):
+            self.queued = []
+        
+        def queue_message(self, message):
+            self.queued.append(message)
+    
+    manager = ConnectionManager()
+    pipelines = [FakePipeline(), FakePipeline()]
+    for client_id, pipeline in enumerate(pipelines):
+        manager.connections[client_id] = Connection(FakeWebSocket(), pipeline)
+    
+    asyncio.run(manager.broadcast({"type": "notice", "text": "hello"}))
+    
+    first, second = (pipeline.queued for pipeline in pipelines)
+    assert len(first) == len(second) == 1
+    assert first[0] is second[0]
+    assert orjson.loads(orjson.dumps(first[0])) == {"type": "notice", "text": "hello"}
+
+def test_sessions_over_the_limit_are_closed_with_1013(monkeypatch):
+    """A rejected handshake is accepted and then closed with try-again-later"""
+    monkeypatch.setattr(SETTINGS, "max_connections", 0)
+    with TestClient(app).websocket_connect("/ws") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1013
+
+def test_session_slot_is_taken_before_the_handshake_awaits():
+    """The connection counts towards the limit before accept() yields"""
+    class FakeWebSocket:
+        client_state = WebSocketState.CONNECTING
+        
+        async def accept(self):
+            self.open_sessions = len(manager.connections)
+            raise WebSocketDisconnect()
+    
+    websocket = FakeWebSocket()
+    asyncio.run(websocket_endpoint(websocket))
+    assert websocket.open_sessions == 1
+    assert not manager.connections
@@ -3,19 +3,17 @@ Logging configuration
 """
 import logging
 import sys
-from config import get_settings
+from config import SETTINGS
 
 def setup_logger():
     """Setup application logger"""
-    settings = get_settings()
-    
     # Create logger
     logger = logging.getLogger()
-    logger.setLevel(getattr(logging, settings.log_level))
+    logger.setLevel(getattr(logging, SETTINGS.log_level))
     
     # Create handler
     handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(getattr(logging, settings.log_level))
+    handler.setLevel(getattr(logging, SETTINGS.log_level))
     
     # Create formatter
     formatter = logging.Formatter(
@@ -1,6 +1,7 @@
 export interface RTVIMessage {
-  type: "audio" | "text" | "control" | "error" | "voice_command_response" | "text_received" | "connection_established"
+  type: "audio" | "text" | "control" | "error" | "voice_command_response" | "text_received" | "connection_established" | "batch"
   data?: any
+  items?: RTVIMessage[]
   response?: any
   text?: string
   timestamp?: number
@@ -19,7 +20,8 @@ export class WebSocketService {
   public onVoiceCommandResponse?: (response: any) => void
   public onError?: (error: string) => void
 
-  constructor(private url = "ws://localhost:5050/ws") {}
+  // batch=1 opts in to coalesced {"type": "batch"} frames, unpacked below
+  constructor(private url = "ws://localhost:5050/ws?batch=1") {}
 
   async connect(): Promise<void> {
     if (this.isConnecting || this.isConnected()) {
@@ -32,6 +34,8 @@ export class WebSocketService {
 
     try {
       this.ws = new WebSocket(this.url)
+      // Audio output arrives as raw PCM binary frames
+      this.ws.binaryType = "arraybuffer"
 
       this.ws.onopen = () => {
         console.log("✅ WebSocket connected successfully to:", this.url)
@@ -90,49 +94,59 @@ export class WebSocketService {
         const message: RTVIMessage = JSON.parse(event.data)
         console.log("🔍 Parsed WebSocket message:", message)
 
-        switch (message.type) {
-          case "audio":
-            if (message.data) {
-              // Convert base64 to ArrayBuffer if needed
-              const audioData = this.base64ToArrayBuffer(message.data)
-              this.onAudioReceived?.(audioData)
-            }
-            break
-
-          case "text":
-            console.log("🔍 Received text message:", message.data)
-            this.onTextReceived?.(message.data)
-            break
-
-          case "voice_command_response":
-            // Handle voice command responses from backend
-            console.log("🔔 WebSocket received voice command response:", message.response)
-            console.log("🔔 Calling onVoiceCommandResponse callback...")
-            this.onVoiceCommandResponse?.(message.response)
-            break
-
-          case "connection_established":
-            console.log("🔍 Connection established:", message)
-            break
-
-          case "text_received":
-            console.log("🔍 Text received confirmation:", message.text)
-            break
-
-          case "error":
-            console.log("🔍 Error message:", message.data)
-            this.onError?.(message.data)
-            break
-
-          default:
-            console.log("🔍 Unknown message type:", message.type, message)
+        if (message.type === "batch") {
+          // Backend coalesces bursts of events into a single frame
+          message.items?.forEach((item) => this.dispatchMessage(item))
+          return
         }
+
+        this.dispatchMessage(message)
       }
     } catch (error) {
       console.error("❌ Error handling WebSocket message:", error)
     }
   }
 
+  private dispatchMessage(message: RTVIMessage) {
+    switch (message.type) {
+      case "audio":
+        if (message.data) {
+          // Convert base64 to ArrayBuffer if needed
+          const audioData = this.base64ToArrayBuffer(message.data)
+          this.onAudioReceived?.(audioData)
+        }
+        break
+
+      case "text":
+        console.log("🔍 Received text message:", message.data)
+        this.onTextReceived?.(message.data)
+        break
+
+      case "voice_command_response":
+        // Handle voice command responses from backend
+        console.log("🔔 WebSocket received voice command response:", message.response)
+        console.log("🔔 Calling onVoiceCommandResponse callback...")
+        this.onVoiceCommandResponse?.(message.response)
+        break
+
+      case "connection_established":
+        console.log("🔍 Connection established:", message)
+        break
+
+      case "text_received":
+        console.log("🔍 Text received confirmation:", message.text)
+        break
+
+      case "error":
+        console.log("🔍 Error message:", message.data)
+        this.onError?.(message.data)
+        break
+
+      default:
+        console.log("🔍 Unknown message type:", message.type, message)
+    }
+  }
+
   private base64ToArrayBuffer(base64: string): ArrayBuffer {
     const binaryString = atob(base64)
     const bytes = new Uint8Array(binaryString.length)